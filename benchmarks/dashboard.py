@@ -0,0 +1,161 @@
+"""Headless dashboard benchmark on synthetic event data.
+
+    python -m benchmarks.dashboard --days 60 --route-points 5000 --output bench.json
+    python -m benchmarks.dashboard --output new.json --compare bench.json
+
+Seeds the Mongo stand-in, then runs the app script through Streamlit's
+testing API once per region with empty caches and no snapshots ("cold"), a few more
+times as fresh viewer sessions against warm caches ("warm"), and once
+after a simulated restart that finds the snapshots on disk ("restart").  Each run
+records wall time, per-section spans, Mongo operations, bytes fetched and
+peak Python memory.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import instrumentation
+import mongo
+import snapshots
+import write_queue
+from benchmarks import synthetic
+from benchmarks.standin import MongoStats, standin
+from regions import REGIONS
+
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "imagecomparison.py")
+
+
+def run_app(uri, region, stats, timeout):
+    config = REGIONS[region]
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    at.secrets["MONGO_URI"] = uri
+    at.session_state["region_tab"] = f"{config['icon']} {config['name']}"
+
+    stats.reset()
+    tracemalloc.start()
+    start = time.perf_counter()
+    at.run()
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    sections = instrumentation.summarize(instrumentation.recent_runs[-1])["sections"] if instrumentation.recent_runs else {}
+    return dict(stats.snapshot(),
+                wall_s=wall,
+                sections=sections,
+                peak_memory_bytes=peak,
+                errors=[str(e.value) for e in at.error] + [str(e.value) for e in at.exception])
+
+
+def summarize(runs):
+    # Median of every numeric field across warm runs.
+    def median(values):
+        return statistics.median(values) if values else 0
+    return {
+        "runs": len(runs),
+        "wall_s": median([r["wall_s"] for r in runs]),
+        "queries": median([r["queries"] for r in runs]),
+        "documents_returned": median([r["documents_returned"] for r in runs]),
+        "bytes_fetched": median([r["bytes_fetched"] for r in runs]),
+        "peak_memory_bytes": median([r["peak_memory_bytes"] for r in runs]),
+        "sections": {name: median([r["sections"].get(name, 0.0) for r in runs])
+                     for name in sorted({name for r in runs for name in r["sections"]})},
+        "errors": sorted({e for r in runs for e in r["errors"]}),
+    }
+
+
+def benchmark(seed_args, warm_runs=3, timeout=120):
+    stats = MongoStats()
+    instrumentation.enable()
+    results = {}
+    with standin(stats) as uri, tempfile.TemporaryDirectory() as scratch:
+        # Keep snapshots and the write journal out of the working tree.
+        snapshots.SNAPSHOT_DIR = os.path.join(scratch, "snapshots")
+        write_queue.JOURNAL_PATH = os.path.join(scratch, "journal.sqlite3")
+        seeded = synthetic.seed(mongo.connect(uri), **seed_args)
+        for region in REGIONS:
+            shutil.rmtree(snapshots.SNAPSHOT_DIR, ignore_errors=True)
+            st.cache_data.clear()
+            st.cache_resource.clear()
+            cold = run_app(uri, region, stats, timeout)
+            warm = [run_app(uri, region, stats, timeout) for _ in range(warm_runs)]
+            st.cache_data.clear()
+            st.cache_resource.clear()
+            restart = run_app(uri, region, stats, timeout)
+            results[region] = {"cold": summarize([cold]), "warm": summarize(warm), "restart": summarize([restart])}
+    return seeded, results
+
+
+def compare(old, new):
+    rows = []
+    for region, phases in new["scenarios"].items():
+        for phase, metrics in phases.items():
+            before = old.get("scenarios", {}).get(region, {}).get(phase)
+            if not before:
+                continue
+            for metric in ("wall_s", "queries", "bytes_fetched", "peak_memory_bytes"):
+                rows.append((f"{region}/{phase}", metric, before[metric], metrics[metric]))
+            for name, seconds in metrics["sections"].items():
+                rows.append((f"{region}/{phase}", f"section {name}", before["sections"].get(name, 0.0), seconds))
+    for scenario, metric, a, b in rows:
+        change = f"{(b - a) / a:+.0%}" if a else "new"
+        print(f"{scenario:12} {metric:24} {a:14.4g} -> {b:14.4g}  {change}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(APP), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard headlessly on synthetic data.")
+    synthetic.add_arguments(parser)
+    parser.add_argument("--warm-runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120, help="per-run script timeout in seconds")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    args = parser.parse_args(argv)
+
+    seed_args = synthetic.seed_arguments(args)
+    seeded, scenarios = benchmark(seed_args, warm_runs=args.warm_runs, timeout=args.timeout)
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "params": seed_args,
+        "seeded": seeded,
+        "scenarios": scenarios,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for region, phases in scenarios.items():
+        for phase, metrics in phases.items():
+            sections = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in metrics["sections"].items())
+            print(f"{region}/{phase}: {metrics['wall_s'] * 1000:.0f}ms, {metrics['queries']:.0f} queries, "
+                  f"{metrics['bytes_fetched'] / 1024:.1f} KiB fetched, "
+                  f"peak {metrics['peak_memory_bytes'] / 2**20:.1f} MiB [{sections}]")
+            for error in metrics["errors"]:
+                print(f"  error: {error}")
+    print(f"wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Peak memory of a history export as the history grows.
+
+    python -m benchmarks.export_memory --sizes 10000 100000 1000000
+
+For each size the export writer is fed a generated stream of log documents,
+the way a server cursor hands them over batch by batch, and its peak Python
+memory is compared with loading everything into a DataFrame first.  A flat
+"streamed" column is the point.  (The Mongo stand-in buffers whole result
+sets itself, so it would measure mongomock rather than the exporter; the
+exporter's own cursor handling is the same either way.)
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+import pandas as pd
+
+import export
+from benchmarks import synthetic
+
+
+def log_stream(count, cyclists=65, seed=0):
+    rng = random.Random(seed)
+    names = synthetic.roster("east", cyclists)
+    for i in range(count):
+        yield {"cyclist": names[i % cyclists],
+               "date": (synthetic.EVENT_START + timedelta(days=i // cyclists)).isoformat(),
+               "daily_distance": round(rng.uniform(5, 80), 1)}
+
+
+def streamed(count, fmt, path):
+    chunks = export.chunked("east", "individuals", log_stream(count))
+    if fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as out:
+            return export.write_csv(out, "individuals", chunks)
+    return export.write_parquet(path, "individuals", chunks)
+
+
+def buffered(count, fmt, path):
+    # What an ad-hoc script does: every document in memory, then one write.
+    frame = pd.DataFrame(list(log_stream(count)))
+    frame.insert(0, "region", "east")
+    if fmt == "csv":
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_parquet(path, index=False)
+    return len(frame)
+
+
+def measure(write, count, fmt, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = write(count, fmt, path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert rows == count
+    return peak, elapsed, os.path.getsize(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--format", choices=export.FORMATS, default="csv")
+    parser.add_argument("--skip-buffered", action="store_true", help="only measure the streaming exporter")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, f"export.{args.format}")
+        print(f"{'rows':>10}  {'streamed peak':>14}  {'buffered peak':>14}  {'file':>10}")
+        for size in args.sizes:
+            peak, elapsed, size_bytes = measure(streamed, size, args.format, path)
+            line = f"{size:>10}  {peak / 2**20:10.1f} MiB  "
+            if args.skip_buffered:
+                line += f"{'-':>14}  "
+            else:
+                buffered_peak = measure(buffered, size, args.format, path)[0]
+                line += f"{buffered_peak / 2**20:10.1f} MiB  "
+            print(line + f"{size_bytes / 2**20:6.1f} MiB  ({elapsed:.1f}s streamed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""Event-day load test: many browser sessions at once against the running app.
+
+    python -m benchmarks.load_test --sessions 100 --duration 120 --output load.json
+    python -m benchmarks.load_test --sessions 100 --duration 120 --output after.json --compare load.json
+
+Starts `benchmarks.standin_server` (the real Streamlit server on the seeded
+Mongo stand-in, with admin writes and GPS pings injected every
+`--admin-every` seconds) and opens `--sessions` websocket sessions against
+it over `--ramp` seconds, speaking the browser's protocol.  Each viewer
+lands on the page, then with random think time reruns it, switches region
+tabs or toggles the interactive map, and reruns the live fragments whenever
+the page asks for them, as the browser's timers would.
+
+Rerun latency runs from sending a rerun to the server's script-finished
+message, including any rerun the app starts itself.  Mongo ops/s and memory
+come from the server process; memory per session is the growth of its RSS
+from one warmed-up page load to the peak of the run, divided by the number
+of sessions.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter
+from datetime import datetime, timezone
+
+import websockets
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from benchmarks import synthetic
+from benchmarks.dashboard import git_commit
+from regions import REGIONS
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Relative weight of each viewer action after landing on the page.
+ACTIONS = {"rerun": 1, "switch_tab": 3, "toggle_map": 1}
+STARTUP_SECONDS = 180
+SAMPLE_SECONDS = 1.0
+
+
+class Session:
+    """One browser tab: its websocket, widget values and live fragments."""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.widget_ids = {}  # widget key -> element id
+        self.widgets = {}  # element id -> WidgetState sent with every rerun
+        self.fragments = {}  # fragment id -> seconds between automatic reruns
+        self.cached = set()  # hashes of messages the server may send by reference
+        self.interactive_map = False
+        self.lock = asyncio.Lock()
+
+    def set(self, key, **value):
+        state = WidgetState(id=self.widget_ids[key], **value)
+        self.widgets[state.id] = state
+
+    async def rerun(self, fragment_id=""):
+        # (seconds until the script finished, error messages it showed), or
+        # None for a fragment the last full run no longer drew.
+        msg = BackMsg()
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.is_auto_rerun = bool(fragment_id)
+        msg.rerun_script.widget_states.widgets.extend(self.widgets.values())
+        msg.rerun_script.cached_message_hashes.extend(self.cached)
+        async with self.lock:
+            if fragment_id and fragment_id not in self.fragments:
+                return None
+            if not fragment_id:
+                self.fragments = {}
+            errors = []
+            start = time.perf_counter()
+            await self.websocket.send(msg.SerializeToString())
+            while True:
+                forward = ForwardMsg()
+                forward.ParseFromString(await self.websocket.recv())
+                self._read(forward, errors)
+                if (forward.WhichOneof("type") == "script_finished"
+                        and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN):
+                    return time.perf_counter() - start, errors
+
+    def _read(self, forward, errors):
+        if forward.metadata.cacheable:
+            self.cached.add(forward.hash)
+        kind = forward.WhichOneof("type")
+        if kind == "auto_rerun":
+            self.fragments[forward.auto_rerun.fragment_id] = forward.auto_rerun.interval
+        elif kind == "delta" and forward.delta.WhichOneof("type") == "add_block":
+            self._learn(forward.delta.add_block.id)
+        elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+            element = forward.delta.new_element
+            which = element.WhichOneof("type")
+            if which == "exception":
+                errors.append(element.exception.message)
+            elif which == "alert" and element.alert.format == Alert.ERROR:
+                errors.append(element.alert.body)
+            else:
+                self._learn(getattr(getattr(element, which), "id", ""))
+
+    def _learn(self, element_id):
+        # Widget ids end in their user key: "$$ID-<hash>-<key>".
+        if element_id.startswith("$$ID-"):
+            key = element_id.split("-", 2)[2]
+            if key != "None":
+                self.widget_ids[key] = element_id
+
+
+class Recorder:
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.latencies = {}  # action -> [seconds]
+        self.errors = Counter()
+
+    async def time(self, session, action, fragment_id=""):
+        # A timeout or a dropped connection ends the session.
+        try:
+            outcome = await asyncio.wait_for(session.rerun(fragment_id), self.timeout)
+        except (asyncio.TimeoutError, websockets.ConnectionClosed) as e:
+            self.errors[f"{action}: {type(e).__name__}"] += 1
+            raise
+        if outcome is None:
+            return
+        seconds, errors = outcome
+        self.latencies.setdefault(action, []).append(seconds)
+        for message in errors:
+            self.errors[f"{action}: {message[:200]}"] += 1
+
+
+def tab_label(region):
+    config = REGIONS[region]
+    return f"{config['icon']} {config['name']}"
+
+
+async def viewer(url, recorder, deadline, think, rng):
+    async with websockets.connect(url, max_size=None) as websocket:
+        session = Session(websocket)
+        await recorder.time(session, "page_load")
+        live = asyncio.create_task(live_updates(session, recorder, rng))
+        try:
+            region = next(iter(REGIONS))
+            while True:
+                await asyncio.sleep(min(rng.expovariate(1 / think), max(0.0, deadline - time.monotonic())))
+                if time.monotonic() >= deadline:
+                    break
+                action = rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+                if action == "switch_tab":
+                    region = rng.choice([other for other in REGIONS if other != region])
+                    session.set("region_tab", string_value=tab_label(region))
+                elif action == "toggle_map":
+                    session.interactive_map = not session.interactive_map
+                    session.set("interactive_map", bool_value=session.interactive_map)
+                await recorder.time(session, action)
+        finally:
+            live.cancel()
+
+
+async def live_updates(session, recorder, rng):
+    # The browser reruns each live fragment on its own timer.
+    await asyncio.sleep(rng.uniform(0, min(session.fragments.values(), default=SAMPLE_SECONDS)))
+    while True:
+        for fragment_id in list(session.fragments):
+            await recorder.time(session, "live_fragment", fragment_id)
+        await asyncio.sleep(min(session.fragments.values(), default=SAMPLE_SECONDS))
+
+
+def read_stats(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+async def sample_memory(path, peak):
+    while True:
+        with contextlib.suppress(OSError, ValueError):
+            peak[0] = max(peak[0], read_stats(path)["rss_bytes"])
+        await asyncio.sleep(SAMPLE_SECONDS)
+
+
+async def drive(url, stats_path, sessions, duration, ramp, think, timeout, seed):
+    recorder = Recorder(timeout)
+    rng = random.Random(seed)
+
+    # One visitor first, so library imports and the first cache fills are not
+    # charged to the crowd.
+    async with websockets.connect(url, max_size=None) as websocket:
+        probe = Session(websocket)
+        first_load, errors = await probe.rerun()
+        for region in list(REGIONS)[1:]:
+            probe.set("region_tab", string_value=tab_label(region))
+            await probe.rerun()
+    for message in errors:
+        recorder.errors[f"first page load: {message[:200]}"] += 1
+    await asyncio.sleep(2 * SAMPLE_SECONDS)
+    before = read_stats(stats_path)
+
+    peak = [before["rss_bytes"]]
+    sampler = asyncio.create_task(sample_memory(stats_path, peak))
+    start = time.monotonic()
+    deadline = start + duration
+    tasks = []
+    for i in range(sessions):
+        tasks.append(asyncio.create_task(viewer(url, recorder, deadline, think, random.Random(rng.random()))))
+        await asyncio.sleep(max(0.0, start + ramp * (i + 1) / sessions - time.monotonic()))
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.monotonic() - start
+    await asyncio.sleep(2 * SAMPLE_SECONDS)
+    sampler.cancel()
+    after = read_stats(stats_path)
+
+    for outcome in outcomes:
+        if isinstance(outcome, OSError):
+            recorder.errors[f"connect: {outcome}"] += 1
+    ops = Counter(after["ops"])
+    ops.subtract(before["ops"])
+    latencies = recorder.latencies
+    reruns = [seconds for values in latencies.values() for seconds in values]
+    return {
+        "sessions": sessions,
+        "elapsed_s": elapsed,
+        "first_page_load_s": first_load,
+        "reruns": len(reruns),
+        "reruns_per_s": len(reruns) / elapsed,
+        "latency": percentiles(reruns),
+        "actions": {action: percentiles(values) for action, values in sorted(latencies.items())},
+        "mongo_ops": after["queries"] - before["queries"],
+        "mongo_ops_per_s": (after["queries"] - before["queries"]) / elapsed,
+        "mongo_ops_by_command": {name: count for name, count in ops.items() if count},
+        "bytes_fetched": after["bytes_fetched"] - before["bytes_fetched"],
+        "server_rss_bytes": {"warm": before["rss_bytes"], "peak": peak[0]},
+        "memory_per_session_bytes": max(0, peak[0] - before["rss_bytes"]) / sessions,
+        "dropped_sessions": sum(isinstance(outcome, BaseException) for outcome in outcomes),
+        "errors": dict(recorder.errors),
+    }
+
+
+def percentiles(values):
+    if not values:
+        return {"count": 0, "p50_s": 0.0, "p95_s": 0.0, "p99_s": 0.0, "max_s": 0.0}
+    cuts = statistics.quantiles(values, n=100, method="inclusive") if len(values) > 1 else values * 99
+    return {"count": len(values), "p50_s": cuts[49], "p95_s": cuts[94], "p99_s": cuts[98], "max_s": max(values)}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def app_server(seed_args, admin_every, scratch):
+    # (websocket url, stats file) of a stand-in server that lives for the block.
+    port = free_port()
+    stats_path = os.path.join(scratch, "server_stats.json")
+    log_path = os.path.join(scratch, "server.log")
+    command = [sys.executable, "-m", "benchmarks.standin_server", "--port", str(port),
+               "--admin-every", str(admin_every), "--stats", stats_path]
+    for name, value in seed_args.items():
+        command += [f"--{name.replace('_', '-')}", str(value)]
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(command, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        started = time.monotonic()
+        while True:
+            if process.poll() is not None or time.monotonic() - started > STARTUP_SECONDS:
+                with open(log_path) as log:
+                    raise RuntimeError(f"the stand-in server did not start:\n{log.read()[-2000:]}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                    pass
+                if os.path.exists(stats_path):
+                    break
+            except OSError:
+                pass
+            time.sleep(0.5)
+        yield f"ws://127.0.0.1:{port}/_stcore/stream", stats_path
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def print_report(result):
+    print(f"{result['sessions']} sessions, {result['reruns']} reruns in {result['elapsed_s']:.0f}s "
+          f"({result['reruns_per_s']:.1f}/s); first page load {result['first_page_load_s'] * 1000:.0f}ms")
+    print(f"{'rerun':14} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for action, row in [("all", result["latency"]), *result["actions"].items()]:
+        print(f"{action:14} {row['count']:>6} " +
+              " ".join(f"{row[key] * 1000:7.0f}ms" for key in ("p50_s", "p95_s", "p99_s", "max_s")))
+    print(f"mongo: {result['mongo_ops']} ops ({result['mongo_ops_per_s']:.1f}/s), "
+          f"{result['bytes_fetched'] / 2**20:.1f} MiB fetched")
+    rss = result["server_rss_bytes"]
+    print(f"server memory: {rss['warm'] / 2**20:.0f} MiB warm, {rss['peak'] / 2**20:.0f} MiB peak, "
+          f"{result['memory_per_session_bytes'] / 2**20:.2f} MiB per session")
+    if result["dropped_sessions"]:
+        print(f"{result['dropped_sessions']} sessions dropped")
+    for message, count in sorted(result["errors"].items()):
+        print(f"  error x{count}: {message}")
+
+
+def compare(old, new):
+    before, after = old["result"], new["result"]
+    rows = [(f"latency {key[:-2]}", before["latency"][key], after["latency"][key]) for key in ("p50_s", "p95_s", "p99_s")]
+    rows += [(key, before[key], after[key]) for key in ("reruns_per_s", "mongo_ops_per_s", "memory_per_session_bytes")]
+    for metric, a, b in rows:
+        change = f"{(b - a) / a:+.0%}" if a else "new"
+        print(f"{metric:26} {a:14.4g} -> {b:14.4g}  {change}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the dashboard with concurrent viewer sessions.")
+    synthetic.add_arguments(parser)
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent viewer sessions")
+    parser.add_argument("--duration", type=float, default=120, help="seconds from the first session opening")
+    parser.add_argument("--ramp", type=float, default=20, help="seconds over which sessions open")
+    parser.add_argument("--think", type=float, default=10, help="mean seconds between a viewer's actions")
+    parser.add_argument("--admin-every", type=float, default=5, help="seconds between injected admin writes (0: none)")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds before a rerun counts as failed")
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--compare", help="earlier JSON report to diff against")
+    args = parser.parse_args(argv)
+
+    seed_args = synthetic.seed_arguments(args)
+    with tempfile.TemporaryDirectory() as scratch, app_server(seed_args, args.admin_every, scratch) as (url, stats_path):
+        result = asyncio.run(drive(url, stats_path, args.sessions, args.duration, args.ramp, args.think,
+                                   args.timeout, args.seed))
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "params": dict(seed_args, sessions=args.sessions, duration=args.duration, ramp=args.ramp,
+                       think=args.think, admin_every=args.admin_every),
+        "result": result,
+    }
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
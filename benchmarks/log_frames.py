@@ -0,0 +1,101 @@
+"""Build time and memory of a raw-log DataFrame, untyped versus typed.
+
+    python -m benchmarks.log_frames --logs 100000
+
+"untyped" is how the dashboard used to load logs: whole documents,
+ObjectId included, into `pd.DataFrame`, then `pd.to_datetime` with format
+inference and a group-by over plain strings.  "typed" builds the columns
+the way `frames` does for the rollup rows: a projection, a categorical
+cyclist, float32 distances and dates parsed with a fixed format.  Both are timed end to end against the Mongo stand-in and
+on already-fetched documents, which isolates the DataFrame work.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+
+import frames
+import mongo
+from benchmarks import synthetic
+from benchmarks.standin import MongoStats, standin
+
+
+FIELDS = {"_id": 0, "cyclist": 1, "date": 1, "daily_distance": 1}
+
+
+def synthetic_logs(logs, cyclists, seed=0):
+    rng = random.Random(seed)
+    names = synthetic.roster("east", cyclists)
+    days = max(logs // cyclists, 1)
+    return names, [{"cyclist": names[i % cyclists],
+                    "date": (synthetic.EVENT_START + timedelta(days=(i // cyclists) % days)).isoformat(),
+                    "daily_distance": round(rng.uniform(5, 80), 1)} for i in range(logs)]
+
+
+def untyped(docs):
+    df = pd.DataFrame(docs)
+    df['date'] = pd.to_datetime(df['date'])
+    return df, df.groupby('cyclist')['daily_distance'].sum()
+
+
+def typed_frame(docs, roster):
+    cyclists, days, distances = [], [], []
+    for doc in docs:
+        cyclists.append(doc.get("cyclist"))
+        days.append(doc.get("date"))
+        distances.append(doc.get("daily_distance"))
+    return pd.DataFrame({
+        "cyclist": frames.cyclist_column(cyclists, roster),
+        "date": frames.date_column(days),
+        "daily_distance": np.array(distances, dtype=np.float32),
+    })
+
+
+def typed(df):
+    return df, df.groupby('cyclist', observed=True)['daily_distance'].sum()
+
+
+def measure(label, build):
+    # Timed without tracing first, since tracemalloc slows Python code down.
+    start = time.perf_counter()
+    df, totals = build()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    size = df.memory_usage(deep=True).sum()
+    print(f"{label:>24}: {elapsed * 1000:8.1f} ms  peak {peak / 2**20:7.1f} MiB  frame {size / 2**20:6.1f} MiB")
+    return elapsed, totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logs", type=int, default=100_000)
+    parser.add_argument("--cyclists", type=int, default=65)
+    args = parser.parse_args(argv)
+
+    roster, docs = synthetic_logs(args.logs, args.cyclists)
+    fetched = [dict(doc, _id=ObjectId()) for doc in docs]
+    print(f"{args.logs} logs, {args.cyclists} cyclists")
+
+    before, old_totals = measure("untyped, fetched docs", lambda: untyped(fetched))
+    after, new_totals = measure("typed, fetched docs", lambda: typed(typed_frame(fetched, roster)))
+    print(f"DataFrame build {before / after:.1f}x faster")
+    assert np.allclose(old_totals, new_totals.reindex(old_totals.index).astype("float64"), rtol=1e-5)
+
+    with standin(MongoStats()) as uri:
+        dbs = mongo.region_collections(mongo.connect(uri), "east")
+        for start in range(0, len(docs), 10_000):
+            dbs["individuals"].insert_many([dict(doc) for doc in docs[start:start + 10_000]])
+        measure("untyped, from Mongo", lambda: untyped(list(dbs["individuals"].find())))
+        measure("typed, from Mongo", lambda: typed(typed_frame(dbs["individuals"].find({}, FIELDS, batch_size=10_000), roster)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Ping ingestion throughput and track query latency.
+
+    python -m benchmarks.ping_ingest --points 2000000 --batch 500
+
+Feeds a simulated 1 Hz GPS trace, batch by batch, through `pings.ingest`
+into the Mongo stand-in, then times what the map does with it: the first
+`Track.refresh` over every bucket, later refreshes that re-read only the
+bucket still filling, and the size of the line handed to the map.
+"""
+import argparse
+import math
+import statistics
+import time
+
+import numpy as np
+
+import mongo
+import pings
+from benchmarks import synthetic
+from benchmarks.standin import MongoStats, standin
+from regions import REGIONS
+
+
+def trace(bounds, count, start, seed=0):
+    # A meandering 1 Hz trace across the region, as parsed pings.
+    rng = np.random.default_rng(seed)
+    (south, west), (north, east) = bounds
+    progress = np.linspace(0, 1, count)
+    lat = south + (north - south) * progress + np.cumsum(rng.normal(0, 2e-5, count))
+    lng = west + (east - west) * (0.5 + 0.3 * np.sin(progress * 6 * math.pi)) + np.cumsum(rng.normal(0, 2e-5, count))
+    t = start + np.arange(count, dtype=np.float64)
+    return [(pings.DEFAULT_DEVICE, float(a), float(b), float(c)) for a, b, c in zip(t, lat, lng)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=500, help="pings per POST / file")
+    parser.add_argument("--region", default="east", choices=sorted(REGIONS))
+    args = parser.parse_args(argv)
+
+    start = time.mktime(synthetic.EVENT_START.timetuple())
+    batch = trace(REGIONS[args.region]["map_bounds"], args.points, start)
+    stats = MongoStats()
+    with standin(stats) as uri:
+        db = mongo.connect(uri)
+        collection = mongo.region_collections(db, args.region)["pings"]
+        collection.create_index([("device", 1), ("start", 1)])
+
+        stats.reset()
+        latencies = []
+        began = time.perf_counter()
+        for i in range(0, len(batch), args.batch):
+            tick = time.perf_counter()
+            pings.ingest(collection, batch[i:i + args.batch])
+            latencies.append(time.perf_counter() - tick)
+        elapsed = time.perf_counter() - began
+        writes = stats.snapshot()["queries"]
+        print(f"ingest: {args.points:,} pings in {elapsed:.1f}s = {args.points / elapsed:,.0f} pings/s, "
+              f"{writes:,} upserts, {collection.count_documents({}):,} bucket documents")
+        print(f"  per batch of {args.batch}: p50 {statistics.median(latencies) * 1000:.2f} ms, "
+              f"max {max(latencies) * 1000:.2f} ms")
+
+        # "Now" sits inside the last bucket, so it is the one still filling.
+        now = batch[-1][1] + 1
+        track = pings.Track()
+        tick = time.perf_counter()
+        line = track.refresh(collection, now=now)
+        first = time.perf_counter() - tick
+        print(f"first refresh: {first * 1000:.0f} ms, {len(line['points']):,} of {args.points:,} points drawn")
+
+        # The vehicle keeps posting five pings at a time; each viewer refresh follows.
+        # Buckets stamped within the overlap of the newest upload are re-read,
+        # so wait until the bulk load is history rather than a late upload.
+        time.sleep(pings.INGEST_OVERLAP_SECONDS + 1)
+        device, last, lat, lng = batch[-1]
+        timings, documents = [], []
+        for step in range(10):
+            pings.ingest(collection, [(device, last + 5 * step + k, lat, lng) for k in range(1, 6)])
+            stats.reset()
+            tick = time.perf_counter()
+            line = track.refresh(collection, now=now + 5 * (step + 1), max_age=0)
+            timings.append(time.perf_counter() - tick)
+            documents.append(stats.snapshot()["documents_returned"])
+        print(f"incremental refresh: p50 {statistics.median(timings) * 1000:.1f} ms, "
+              f"{statistics.median(documents):.0f} bucket documents read, {len(line['points']):,} points drawn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Route map payload and render time on a synthetic recorded GPS track.
+
+    python -m benchmarks.route_payload --points 50000 --checkpoints 40
+
+Compares drawing every point (a marker per stop plus the full polyline, as
+the dashboard used to) with the simplified route layer from `route_map`.
+"""
+import argparse
+import time
+
+import folium
+import numpy as np
+
+import route_geometry
+import route_map
+
+
+CENTER = (15.0, 85.0)
+BOUNDS = ((8.0, 76.0), (24.0, 89.0))
+
+
+def synthetic_track(points, checkpoints, seed=0):
+    # A smooth coastal ride with GPS jitter; every n-th fix is a named checkpoint.
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0.0, 1.0, points)
+    lat = 9.0 + 13.0 * t + 0.6 * np.sin(t * 9.0) + rng.normal(0, 0.00005, points)
+    lng = 77.0 + 10.0 * t + 0.8 * np.cos(t * 7.0) + rng.normal(0, 0.00005, points)
+    every = max(points // max(checkpoints, 1), 1)
+    return [{
+        "name": f"Checkpoint {i // every + 1}" if i % every == 0 else "",
+        "date": "2026-01-01",
+        "lat": float(lat[i]),
+        "lng": float(lng[i]),
+    } for i in range(points)]
+
+
+def legacy_layer(stops):
+    m = folium.Map(location=list(CENTER), zoom_start=6, tiles=route_map.TILES, attr='Google')
+    for stop in stops:
+        folium.Marker([stop['lat'], stop['lng']],
+                      popup=f"<b>📍 {stop['name']}</b><br><i>Expected: {stop['date']}</i><br><small>Route checkpoint</small>",
+                      tooltip=f"{stop['name']} ({stop['date']})",
+                      icon=folium.DivIcon(html='🚴', icon_size=(10,10), icon_anchor=(15,15))).add_to(m)
+    folium.PolyLine(locations=[[stop['lat'], stop['lng']] for stop in stops],
+                    color="blue", weight=4, opacity=0.7, popup="Planned Route").add_to(m)
+    m.fit_bounds([list(corner) for corner in BOUNDS])
+    return m
+
+
+def measure(label, build):
+    start = time.perf_counter()
+    m = build()
+    built = time.perf_counter()
+    html = m.get_root().render()
+    rendered = time.perf_counter()
+    print(f"{label:>10}: build {built - start:7.3f}s  render {rendered - built:7.3f}s  "
+          f"payload {len(html.encode()) / 1024:10.1f} KiB")
+    return len(html.encode())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=50_000)
+    parser.add_argument("--checkpoints", type=int, default=40)
+    parser.add_argument("--skip-legacy", action="store_true", help="only measure the simplified layer")
+    args = parser.parse_args(argv)
+
+    stops = synthetic_track(args.points, args.checkpoints)
+    kept = route_geometry.polyline_indices(stops)
+    print(f"{args.points} points, {len(route_geometry.checkpoint_indices(stops))} markers, "
+          f"{len(kept)} polyline vertices after simplification at zoom {route_geometry.DETAIL_ZOOM}")
+
+    after = measure("simplified", lambda: route_map._route_layer(route_map._route_shape("bench", stops), CENTER, BOUNDS))
+    if not args.skip_legacy:
+        before = measure("legacy", lambda: legacy_layer(stops))
+        print(f"payload reduced {before / after:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Local Mongo stand-in for the benchmarks: mongomock with op accounting.
+
+Inside `standin()` every `pymongo.MongoClient` pointed at the stand-in
+address shares one in-memory server, and every collection call and every
+document handed back to the caller is counted in a `MongoStats`.
+"""
+import contextlib
+import threading
+from collections import Counter
+
+import bson
+import mongomock
+from mongomock.collection import Collection, Cursor
+from mongomock.command_cursor import CommandCursor
+
+
+HOST, PORT = "localhost", 27017
+URI = f"mongodb://{HOST}:{PORT}"
+
+OPERATIONS = (
+    "find", "find_one", "aggregate", "count_documents", "estimated_document_count",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "bulk_write", "create_index",
+)
+
+
+class MongoStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.ops = Counter()
+            self.documents = 0
+            self.bytes = 0
+
+    def record_op(self, name):
+        with self._lock:
+            self.ops[name] += 1
+
+    def record_document(self, doc):
+        size = len(bson.encode(doc)) if isinstance(doc, dict) else 0
+        with self._lock:
+            self.documents += 1
+            self.bytes += size
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "queries": sum(self.ops.values()),
+                "ops": dict(self.ops),
+                "documents_returned": self.documents,
+                "bytes_fetched": self.bytes,
+            }
+
+
+@contextlib.contextmanager
+def standin(stats=None):
+    # Yields the connection string to hand to the app or the seeder.
+    with mongomock.patch(servers=((HOST, PORT),)):
+        if stats is None:
+            yield URI
+            return
+        with _accounting(stats):
+            yield URI
+
+
+@contextlib.contextmanager
+def _accounting(stats):
+    depth = threading.local()
+    originals = {}
+
+    def counted(name, method):
+        # Only the outermost call counts: find_one calls find internally.
+        def wrapper(self, *args, **kwargs):
+            level = getattr(depth, "level", 0)
+            if level == 0:
+                stats.record_op(name)
+            depth.level = level + 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                depth.level = level
+        return wrapper
+
+    def measured(method):
+        def wrapper(self):
+            doc = method(self)
+            stats.record_document(doc)
+            return doc
+        return wrapper
+
+    for name in OPERATIONS:
+        originals[(Collection, name)] = getattr(Collection, name)
+        setattr(Collection, name, counted(name, originals[(Collection, name)]))
+    for cls in (Cursor, CommandCursor):
+        originals[(cls, "__next__")] = cls.__next__
+        cls.__next__ = measured(cls.__next__)
+    try:
+        yield stats
+    finally:
+        for (cls, name), method in originals.items():
+            setattr(cls, name, method)
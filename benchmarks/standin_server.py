@@ -0,0 +1,131 @@
+"""The dashboard served by Streamlit on the seeded Mongo stand-in.
+
+    python -m benchmarks.standin_server --port 8599 --days 30
+    python -m benchmarks.standin_server --port 8599 --admin-every 5 --stats stats.json
+
+Seeds synthetic event data into the in-process stand-in and runs the real
+Streamlit server on it, so the app can be opened in a browser or driven by
+`benchmarks.load_test` without a Mongo server.  Snapshots, the write
+journal and the secrets file live in a temporary directory.
+
+With `--admin-every`, a background writer plays the admins: it queues a
+cyclist distance, a team entry or a location through its own write queue
+every so many seconds and posts a few GPS pings, the way a second app
+replica and the support vehicle would.  With `--stats`, the process's
+Mongo operation counts and resident memory are written to that JSON file
+every half second.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+from datetime import date
+
+from streamlit.web import bootstrap
+
+import changes
+import dates
+import mongo
+import pings
+import snapshots
+import write_queue
+from benchmarks import synthetic
+from benchmarks.dashboard import APP
+from benchmarks.standin import MongoStats, standin
+from regions import REGIONS
+
+
+STATS_SECONDS = 0.5
+PINGS_PER_WRITE = 5
+
+
+def resident_memory():
+    # Current RSS in bytes; the peak where /proc is not available.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def report_stats(stats, path):
+    while True:
+        snapshot = dict(stats.snapshot(), rss_bytes=resident_memory(), time=time.time())
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(temporary, path)
+        time.sleep(STATS_SECONDS)
+
+
+def inject_writes(db, every, journal, seed=0):
+    # Admin entries and vehicle pings, round robin over the regions.
+    rng = random.Random(seed)
+    region_db = lambda region: mongo.region_collections(db, region)
+    queue = write_queue.WriteQueue(region_db, lambda region, collections: changes.bump(region_db(region), *collections),
+                                   path=journal)
+    vehicles = {region: list(config["map_center"]) for region, config in REGIONS.items()}
+    for n in itertools.count():
+        time.sleep(every)
+        region = list(REGIONS)[n % len(REGIONS)]
+        config = REGIONS[region]
+        (south, west), (north, east) = config["map_bounds"]
+        today = date.today()
+        kind = ("individuals", "team", "locations")[n // len(REGIONS) % 3]
+        if kind == "individuals":
+            doc = {"cyclist": rng.choice(config["roster"]), "date": dates.stored(today),
+                   "daily_distance": round(rng.uniform(5, 80), 1)}
+        elif kind == "team":
+            doc = {"date": dates.stored(today), "team_total_distance": round(rng.uniform(50, 400), 1),
+                   "team_avg_speed": round(rng.uniform(15, 30), 1)}
+        else:
+            doc = {"name": f"Checkpoint {n}", "lat": rng.uniform(south, north), "lng": rng.uniform(west, east),
+                   "date": today.isoformat()}
+        queue.submit(region, kind, [doc])
+        now, vehicle = time.time(), vehicles[region]
+        batch = []
+        for i in range(PINGS_PER_WRITE):
+            vehicle[0] += rng.gauss(0, 1e-4)
+            vehicle[1] += rng.gauss(0, 1e-4)
+            batch.append((pings.DEFAULT_DEVICE, now - PINGS_PER_WRITE + i, vehicle[0], vehicle[1]))
+        pings.ingest(region_db(region)["pings"], batch)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    synthetic.add_arguments(parser)
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--admin-every", type=float, default=0, help="seconds between injected admin writes (0: none)")
+    parser.add_argument("--stats", help="keep Mongo op counts and memory in this JSON file")
+    args = parser.parse_args(argv)
+
+    stats = MongoStats()
+    with standin(stats) as uri, tempfile.TemporaryDirectory() as scratch:
+        snapshots.SNAPSHOT_DIR = os.path.join(scratch, "snapshots")
+        write_queue.JOURNAL_PATH = os.path.join(scratch, "journal.sqlite3")
+        db = mongo.connect(uri)
+        synthetic.seed(db, **synthetic.seed_arguments(args))
+        secrets = os.path.join(scratch, "secrets.toml")
+        with open(secrets, "w") as f:
+            f.write(f'MONGO_URI = "{uri}"\n')
+
+        if args.stats:
+            threading.Thread(target=report_stats, args=(stats, args.stats), name="stats", daemon=True).start()
+        if args.admin_every:
+            threading.Thread(target=inject_writes, name="admin-writes", daemon=True,
+                             args=(db, args.admin_every, os.path.join(scratch, "injected.sqlite3"), args.seed)).start()
+
+        flags = {"server_port": args.port, "server_headless": True, "server_fileWatcherType": "none",
+                 "browser_gatherUsageStats": False, "secrets_files": [secrets]}
+        bootstrap.load_config_options(flags)
+        bootstrap.run(APP, False, [], flags)
+
+
+if __name__ == "__main__":
+    main()
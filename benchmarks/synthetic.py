@@ -0,0 +1,105 @@
+"""Synthetic event data for the benchmarks.
+
+    python -m benchmarks.synthetic --uri mongodb://localhost:27017 --days 30
+
+seeds a real server the same way the benchmark seeds its stand-in.
+"""
+import argparse
+import math
+import random
+from datetime import date, datetime, time, timedelta
+
+import mongo
+import rollups
+from regions import REGIONS
+
+
+EVENT_START = date(2026, 1, 1)
+
+
+def roster(region, cyclists):
+    names = list(REGIONS[region]["roster"][:cyclists])
+    names += [f"Rider {i}" for i in range(len(names) + 1, cyclists + 1)]
+    return names
+
+
+def seed(db, regions=tuple(REGIONS), cyclists=65, days=30, route_points=500, checkpoints=40,
+         locations=200, beacons=20, seed=0):
+    # Replaces every region collection with fresh data and rebuilt rollups.
+    rng = random.Random(seed)
+    counts = {}
+    for region in regions:
+        dbs = mongo.region_collections(db, region)
+        for collection in dbs.values():
+            collection.delete_many({})
+
+        names = roster(region, cyclists)
+        day_strings = [(EVENT_START + timedelta(days=d)).isoformat() for d in range(days)]
+        individuals = [{"cyclist": name, "date": day, "daily_distance": round(rng.uniform(5, 80), 1)}
+                       for day in day_strings for name in names]
+        team = [{"date": day, "team_total_distance": round(rng.uniform(200, 900), 1),
+                 "team_avg_speed": round(rng.uniform(12, 28), 1)} for day in day_strings]
+        route = _track(REGIONS[region]["map_bounds"], route_points, checkpoints, day_strings, rng)
+        fixes = [dict(route[int(i * (len(route) - 1) / max(locations - 1, 1))], name=f"Support van {i + 1}",
+                      date=day_strings[min(i * days // max(locations, 1), days - 1)]) for i in range(locations)] if route else []
+        beacon_docs = [{"url": f"https://strava.com/beacon/{region}{i}",
+                        "date": day_strings[min(i * days // max(beacons, 1), days - 1)],
+                        "time": datetime.combine(EVENT_START, time(6)).isoformat(),
+                        "active": i == beacons - 1} for i in range(beacons)] if days else []
+
+        for name, docs in (("individuals", individuals), ("team", team), ("route", route),
+                           ("locations", fixes), ("beacons", beacon_docs)):
+            for start in range(0, len(docs), 10_000):
+                dbs[name].insert_many(docs[start:start + 10_000])
+        rollups.rebuild(dbs)
+        counts[region] = {"individuals": len(individuals), "team": len(team), "route": len(route),
+                          "locations": len(fixes), "beacons": len(beacon_docs)}
+    return counts
+
+
+def _track(bounds, points, checkpoints, day_strings, rng):
+    # A wiggly line across the region's map bounds with named checkpoints.
+    if points <= 0:
+        return []
+    (south, west), (north, east) = bounds
+    every = max(points // max(checkpoints, 1), 1)
+    track = []
+    for i in range(points):
+        t = i / max(points - 1, 1)
+        checkpoint = i % every == 0
+        track.append({
+            "name": f"Checkpoint {i // every + 1}" if checkpoint else "",
+            "date": day_strings[min(int(t * len(day_strings)), len(day_strings) - 1)] if day_strings else "",
+            "lat": south + (north - south) * t + 0.3 * math.sin(t * 12) + rng.gauss(0, 0.0005),
+            "lng": west + (east - west) * (0.5 + 0.4 * math.sin(t * 5)) + rng.gauss(0, 0.0005),
+        })
+    return track
+
+
+def add_arguments(parser):
+    parser.add_argument("--cyclists", type=int, default=65)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--route-points", type=int, default=500)
+    parser.add_argument("--checkpoints", type=int, default=40)
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--beacons", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def seed_arguments(args):
+    return {"cyclists": args.cyclists, "days": args.days, "route_points": args.route_points,
+            "checkpoints": args.checkpoints, "locations": args.locations, "beacons": args.beacons,
+            "seed": args.seed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed a Cyclothon database with synthetic event data.")
+    mongo.add_uri_argument(parser)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    for region, counts in seed(mongo.connect_args(parser, args), **seed_arguments(args)).items():
+        print(region, counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Whole-roster daily entry: the editable grid, CSV upload and validation."""
+import math
+
+import pandas as pd
+
+import dates
+
+
+# Upper bound for a single cyclist's day; anything above is a typo.
+MAX_DAILY_DISTANCE = 500.0
+
+CYCLIST_COLUMN = "Cyclist"
+DISTANCE_COLUMN = "Distance (km)"
+
+# CSV headers accepted besides the grid's own column names.
+_CSV_ALIASES = {
+    "cyclist": CYCLIST_COLUMN,
+    "daily_distance": DISTANCE_COLUMN,
+    "distance": DISTANCE_COLUMN,
+    "distance (km)": DISTANCE_COLUMN,
+}
+
+
+def roster_frame(roster):
+    return pd.DataFrame({CYCLIST_COLUMN: list(roster), DISTANCE_COLUMN: [0.0] * len(roster)})
+
+
+def read_csv(file):
+    frame = pd.read_csv(file)
+    frame = frame.rename(columns=lambda name: _CSV_ALIASES.get(str(name).strip().lower(), str(name).strip()))
+    missing = {CYCLIST_COLUMN, DISTANCE_COLUMN} - set(frame.columns)
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(sorted(missing))}")
+    return frame[[CYCLIST_COLUMN, DISTANCE_COLUMN]]
+
+
+def build_entries(frame, roster, day):
+    # (entries, problems).  Rows with no distance are skipped; nothing should
+    # be written while `problems` is non-empty.
+    known = set(roster)
+    entries, problems, seen = [], [], set()
+    for line, (cyclist, distance) in enumerate(zip(frame[CYCLIST_COLUMN], frame[DISTANCE_COLUMN]), start=1):
+        cyclist = "" if pd.isna(cyclist) else str(cyclist).strip()
+        try:
+            distance = 0.0 if pd.isna(distance) or distance == "" else float(distance)
+        except (TypeError, ValueError):
+            problems.append(f"Row {line}: distance {distance!r} is not a number")
+            continue
+        if distance == 0:
+            continue
+        if cyclist not in known:
+            problems.append(f"Row {line}: {cyclist or 'blank name'} is not on the roster")
+        elif cyclist in seen:
+            problems.append(f"Row {line}: {cyclist} appears more than once")
+        elif not math.isfinite(distance) or distance < 0 or distance > MAX_DAILY_DISTANCE:
+            problems.append(f"Row {line}: {distance}km for {cyclist} is outside 0-{MAX_DAILY_DISTANCE:.0f}km")
+        else:
+            seen.add(cyclist)
+            entries.append({"cyclist": cyclist, "date": dates.stored(day), "daily_distance": distance})
+    return entries, problems
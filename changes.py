@@ -0,0 +1,28 @@
+"""Per-region change counters.
+
+Every admin write bumps a counter for each collection it touched in the
+region's single `changes` document.  Live dashboards poll that one small
+document to learn whether anything changed since they last looked, and
+only then reload data.
+"""
+
+
+VERSIONS_ID = "versions"
+
+
+def bump(dbs, *collections):
+    dbs["changes"].update_one(
+        {"_id": VERSIONS_ID},
+        {"$inc": {collection: 1 for collection in collections}},
+        upsert=True)
+
+
+def versions(dbs):
+    doc = dbs["changes"].find_one({"_id": VERSIONS_ID}) or {}
+    doc.pop("_id", None)
+    return doc
+
+
+def changed(old, new):
+    # Collections whose counter differs between two `versions` snapshots.
+    return {collection for collection in set(old) | set(new) if old.get(collection) != new.get(collection)}
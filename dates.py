@@ -0,0 +1,78 @@
+"""Log dates as ISO strings or as real BSON dates.
+
+Individual and team logs have always stored `date` as an ISO string.  The
+migration to BSON dates runs in three steps, and the app works at every
+point along the way:
+
+1. Deploy readers that accept either form (`day_key`, `frames`).  Rollups
+   stay keyed by the ISO string whichever form a log uses.
+2. Convert the stored strings, server side and idempotently:
+
+       python dates.py --uri mongodb://... east west
+
+3. Set CYCLOTHON_BSON_DATES so new logs are written as dates as well.
+
+Locations and beacons keep their string dates; they are only displayed.
+"""
+import argparse
+import os
+from datetime import date, datetime
+
+import mongo
+
+
+BSON_DATES = bool(os.environ.get("CYCLOTHON_BSON_DATES"))
+
+# Collections whose `date` field is migrated.
+LOG_COLLECTIONS = ("individuals", "team")
+
+
+def stored(day):
+    # The value a log written for `day` stores in its `date` field.
+    if BSON_DATES:
+        return datetime(day.year, day.month, day.day)
+    return day.isoformat()
+
+
+def day_key(value):
+    # "YYYY-MM-DD" for a stored string, date or datetime.
+    if isinstance(value, str):
+        return value[:10]
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def migrate(dbs, collections=LOG_COLLECTIONS):
+    # {collection: documents converted}.  Safe to rerun: only string dates match.
+    converted = {}
+    for name in collections:
+        result = dbs[name].update_many(
+            {"date": {"$type": "string"}},
+            [{"$set": {"date": {"$dateFromString": {"dateString": "$date", "format": "%Y-%m-%d"}}}}])
+        converted[name] = result.modified_count
+    return converted
+
+
+def remaining(dbs, collections=LOG_COLLECTIONS):
+    return {name: dbs[name].count_documents({"date": {"$type": "string"}}) for name in collections}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert Cyclothon log dates from ISO strings to BSON dates.")
+    parser.add_argument("regions", nargs="*", default=["east", "west"])
+    mongo.add_uri_argument(parser)
+    parser.add_argument("--check", action="store_true", help="only count logs still stored as strings")
+    args = parser.parse_args(argv)
+
+    db = mongo.connect_args(parser, args)
+    for region in args.regions:
+        dbs = mongo.region_collections(db, region)
+        if args.check:
+            print(f"{region}: string dates left {remaining(dbs)}")
+        else:
+            print(f"{region}: converted {migrate(dbs)}")
+
+
+if __name__ == "__main__":
+    main()
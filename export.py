@@ -0,0 +1,172 @@
+"""Streaming export of event history to CSV or Parquet.
+
+    python export.py --uri mongodb://... individuals --format parquet --from 2026-01-01 --to 2026-01-31 -o east.parquet
+    python export.py --uri mongodb://... team --regions east west -o team.csv
+
+Documents are read with batched, projected cursors and filtered on the
+server; each batch is written out before the next one is fetched, so memory
+stays flat however long the history is.  Rows come out region by region in
+date order, whether a log stores its date as a string or a BSON date.  That holds for the CLI; the
+dashboard's download button hands Streamlit the finished file as bytes,
+which it keeps in memory until the download is served.
+"""
+import argparse
+import csv
+import heapq
+import io
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import dates
+import mongo
+
+
+BATCH_SIZE = 5_000
+
+# Exported columns per collection, after a leading "region" column.
+COLUMNS = {
+    "individuals": {"cyclist": pa.string(), "date": pa.date32(), "daily_distance": pa.float64()},
+    "team": {"date": pa.date32(), "team_total_distance": pa.float64(), "team_avg_speed": pa.float64()},
+    "locations": {"name": pa.string(), "date": pa.date32(), "lat": pa.float64(), "lng": pa.float64()},
+}
+FORMATS = ("csv", "parquet")
+
+# How `date` may be stored: an ISO string, a BSON date, or neither (missing).
+DATE_FORMS = (
+    {"date": {"$type": "string"}},
+    {"date": {"$type": "date"}},
+    {"$nor": [{"date": {"$type": "string"}}, {"date": {"$type": "date"}}]},
+)
+
+
+def export_filter(start=None, end=None, cyclist=None):
+    # Dates may be stored as ISO strings or BSON dates (see `dates`), so a
+    # range matches either form.
+    conditions = []
+    if start or end:
+        as_text, as_date = {}, {}
+        if start:
+            as_text["$gte"] = start.isoformat()
+            as_date["$gte"] = datetime(start.year, start.month, start.day)
+        if end:
+            as_text["$lte"] = end.isoformat()
+            as_date["$lt"] = datetime(end.year, end.month, end.day) + timedelta(days=1)
+        conditions.append({"$or": [{"date": dict(as_text, **{"$type": "string"})}, {"date": as_date}]})
+    if cyclist:
+        conditions.append({"cyclist": cyclist})
+    return {"$and": conditions} if conditions else {}
+
+
+def batches(db, collection, regions, start=None, end=None, cyclist=None, batch_size=BATCH_SIZE):
+    # Column dicts of at most `batch_size` rows, region by region, by date.
+    fields = COLUMNS[collection]
+    query = export_filter(start, end, cyclist if collection == "individuals" else None)
+    projection = dict({name: 1 for name in fields}, _id=0)
+    for region in regions:
+        # Mongo sorts every string before every BSON date, so each storage
+        # form gets its own sorted cursor and the cursors are merged by day.
+        cursors = [mongo.region_collections(db, region)[collection].find(
+            {"$and": [query, form]} if query else form, projection, batch_size=batch_size).sort("date", 1)
+            for form in DATE_FORMS]
+        docs = heapq.merge(*cursors, key=lambda doc: dates.day_key(doc.get("date")) or "")
+        yield from chunked(region, collection, docs, batch_size)
+
+
+def chunked(region, collection, docs, batch_size=BATCH_SIZE):
+    fields = COLUMNS[collection]
+    rows = []
+    for doc in docs:
+        rows.append(doc)
+        if len(rows) == batch_size:
+            yield _columns(region, fields, rows)
+            rows = []
+    if rows:
+        yield _columns(region, fields, rows)
+
+
+def _columns(region, fields, rows):
+    columns = {"region": [region] * len(rows)}
+    for name in fields:
+        values = [row.get(name) for row in rows]
+        if name == "date":
+            values = [date.fromisoformat(dates.day_key(value)) if value else None for value in values]
+        columns[name] = values
+    return columns
+
+
+def write_csv(out, collection, chunks):
+    # `out` is a text file; returns the number of rows written.
+    writer = csv.writer(out)
+    writer.writerow(["region", *COLUMNS[collection]])
+    written = 0
+    for columns in chunks:
+        writer.writerows(zip(*columns.values()))
+        written += len(columns["region"])
+    return written
+
+
+def write_parquet(out, collection, chunks):
+    # `out` is a path or binary file; one row group per batch.
+    schema = pa.schema([("region", pa.string()), *COLUMNS[collection].items()])
+    written = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for columns in chunks:
+            writer.write_table(pa.table(columns, schema=schema))
+            written += len(columns["region"])
+    return written
+
+
+def export(db, collection, fmt, out, regions, start=None, end=None, cyclist=None, batch_size=BATCH_SIZE):
+    chunks = batches(db, collection, regions, start, end, cyclist, batch_size)
+    if fmt == "csv":
+        return write_csv(out, collection, chunks)
+    return write_parquet(out, collection, chunks)
+
+
+def export_bytes(db, collection, fmt, regions, **filters):
+    # The whole file as bytes, for st.download_button.  It is built in a
+    # temporary file on disk, so only the finished file is held in memory.
+    with tempfile.TemporaryFile() as spool:
+        if fmt == "csv":
+            text = io.TextIOWrapper(spool, encoding="utf-8", newline="", write_through=True)
+            export(db, collection, fmt, text, regions, **filters)
+            text.detach()
+        else:
+            export(db, collection, fmt, spool, regions, **filters)
+        spool.seek(0)
+        return spool.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export Cyclothon history as CSV or Parquet.")
+    parser.add_argument("collection", choices=sorted(COLUMNS))
+    parser.add_argument("--regions", nargs="+", default=["east", "west"])
+    parser.add_argument("--format", choices=FORMATS, help="default: from the output file's extension, else csv")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="first day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="last day, YYYY-MM-DD")
+    parser.add_argument("--cyclist", help="only this cyclist's logs (individuals)")
+    parser.add_argument("-o", "--output", help="output file (default: CSV on stdout)")
+    mongo.add_uri_argument(parser)
+    args = parser.parse_args(argv)
+    fmt = args.format or ("parquet" if args.output and args.output.endswith(".parquet") else "csv")
+    if fmt == "parquet" and not args.output:
+        parser.error("Parquet needs --output")
+
+    db = mongo.connect_args(parser, args)
+    filters = {"start": args.start, "end": args.end, "cyclist": args.cyclist}
+    if fmt == "parquet":
+        written = export(db, args.collection, fmt, args.output, args.regions, **filters)
+    elif args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            written = export(db, args.collection, fmt, out, args.regions, **filters)
+    else:
+        written = export(db, args.collection, fmt, sys.stdout, args.regions, **filters)
+    print(f"{written} rows", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Typed DataFrames for the dashboard.
+
+Columns are built straight from the rollup rows `queries` returns, with
+compact dtypes: `cyclist` as a categorical over the region roster,
+distances as float32 and dates as datetime64 (ISO strings and BSON dates
+alike, see `dates`).
+"""
+import numpy as np
+import pandas as pd
+
+import dates
+
+
+def leaderboard(rows, roster):
+    # `queries.leaderboard` rows as the dashboard's leaderboard table.
+    return pd.DataFrame({
+        "Cyclist": cyclist_column([row["cyclist"] for row in rows], roster),
+        "Total (km)": np.array([row["total"] for row in rows], dtype=np.float32),
+    })
+
+
+def daily_distance(rows):
+    # `queries.daily_team_distance` rows, oldest day first.
+    return pd.DataFrame({
+        "date": date_column([row["date"] for row in rows]),
+        "team_total_distance": np.array([row["team_total_distance"] for row in rows], dtype=np.float32),
+    })
+
+
+def cyclist_column(names, roster):
+    # Roster order first; names logged before a roster change are kept too.
+    names = pd.Series(names, dtype=object)
+    categories = list(roster)
+    known = set(categories)
+    categories += sorted(name for name in names.dropna().unique() if name not in known)
+    return pd.Categorical(names, categories=categories)
+
+
+def date_column(values):
+    # Stored ISO strings (with or without a time) and BSON dates alike, cut to
+    # the day by `dates.day_key` and parsed with a fixed format.
+    days = [dates.day_key(value) for value in values]
+    return pd.to_datetime(pd.Series(days, dtype=object), format="%Y-%m-%d", errors="coerce").to_numpy()
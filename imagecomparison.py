@@ -3,444 +3,497 @@ import pandas as pd
 import pymongo
 from datetime import date, datetime
 import plotly.express as px
-import folium
-from streamlit_folium import st_folium
+from concurrent.futures import Future
+
+import bulk_entry
+import changes
+import dates
+import export
+import frames
+import indexes
+import instrumentation
+import mongo
+import pings
+import queries
+import rollups
+import route_map
+import snapshots
+import write_queue
+from read_cache import ReadCache
+from regions import REGIONS
 
 
 st.set_page_config(page_title="Cyclothon 2026", layout="wide")
+# Admins can record this session's runs from the diagnostics panel.
+instrumentation.begin_run(record=st.session_state.get("diagnostics", False))
+
+LIVE_REFRESH_SECONDS = 15
+CHANGE_POLL_SECONDS = 5
+# How long a submit waits for its write to reach Mongo before the form moves
+# on and leaves it to the write queue.
+WRITE_WAIT_SECONDS = 2
+QUEUED_NOTE = " Saved on this device; it syncs once the connection is back."
+MONGO_POOL_SIZE = 50
+MONGO_TIMEOUT_MS = 5000
+# Sections that are only rebuilt by a full rerun, after one of these changed.
+HEAVY_COLLECTIONS = {"cyclist_totals", "daily_totals", "route"}
 
-if 'east_admin' not in st.session_state:
-    st.session_state.east_admin = False
-if 'west_admin' not in st.session_state:
-    st.session_state.west_admin = False
+for region in REGIONS:
+    if f'{region}_admin' not in st.session_state:
+        st.session_state[f'{region}_admin'] = False
 
 
 @st.cache_resource
-def get_east_db():
-    client = pymongo.MongoClient(st.secrets["MONGO_URI"])
-    db = client["Cyclothon"]
-    return {
-        "individuals": db["east_individuals"],
-        "team": db["east_team"],
-        "locations": db["east_locations"],
-        "route": db["east_route"],
-        "beacons": db["east_beacons"]
-    }
+def get_client():
+    # One connection pool for every region and session.  A short server
+    # selection timeout lets the snapshots take over quickly in an outage.
+    return pymongo.MongoClient(st.secrets["MONGO_URI"], event_listeners=[instrumentation.command_listener],
+                               maxPoolSize=MONGO_POOL_SIZE, serverSelectionTimeoutMS=MONGO_TIMEOUT_MS)
+
+def get_region_db(region):
+    return mongo.region_collections(get_client()[mongo.DB_NAME], region)
 
 @st.cache_resource
-def get_west_db():
-    client = pymongo.MongoClient(st.secrets["MONGO_URI"])
-    db = client["Cyclothon"]
-    return {
-        "individuals": db["west_individuals"],
-        "team": db["west_team"],
-        "locations": db["west_locations"],
-        "route": db["west_route"],
-        "beacons": db["west_beacons"]
-    }
+def get_read_cache():
+    return ReadCache(ttl=30, max_entries=256)
 
+@st.cache_resource
+def get_snapshot_store():
+    return snapshots.SnapshotStore()
 
-st.title("🏔️ Cyclothon 2026")
+def cached_read(region, collection, query, load, ttl=None):
+    # Read cache first, then Mongo, falling back to the region's snapshot.
+    def snapshot_read():
+        return get_snapshot_store().read(region, f"{collection}.{query}", load,
+                                         lambda: get_read_cache().invalidate(region, collection))
+    return get_read_cache().get(region, collection, query, snapshot_read, ttl=ttl)
 
+def record_write(region, *collections):
+    # This process's cache first: if the bump fails, only the other app
+    # instances wait for their cache TTL to see the write.
+    get_read_cache().invalidate(region, "changes", *collections)
+    changes.bump(get_region_db(region), *collections)
 
-east_tab, west_tab = st.tabs(["🌅 East Coast", "🌊 West Coast"])
+@st.cache_resource
+def get_write_queue():
+    # One journal and flush thread per process, shared by every admin session.
+    return write_queue.WriteQueue(get_region_db, lambda region, collections: record_write(region, *collections))
 
+def queue_write(region, kind, docs):
+    # True if the write already reached Mongo, False if it is still queued.
+    queue = get_write_queue()
+    return queue.wait(queue.submit(region, kind, docs), WRITE_WAIT_SECONDS)
+
+@st.cache_resource
+def get_seen_versions():
+    return {}
+
+def sync_changes(region):
+    # At most one small read per poll interval for the whole process.  Writes
+    # from other app instances show up here and evict the stale cache entries.
+    # The poll bypasses the snapshots: an old version map is no use offline,
+    # and saving one every few seconds would put a file write on the page.
+    seen = get_seen_versions()
+    if get_snapshot_store().error(region):
+        return seen.get(region, {})
+    dbs = get_region_db(region)
+    try:
+        current = get_read_cache().get(region, "changes", "versions", lambda: changes.versions(dbs),
+                                       ttl=CHANGE_POLL_SECONDS)
+    except pymongo.errors.PyMongoError:
+        return seen.get(region, {})
+    stale = changes.changed(seen.get(region, current), current)
+    seen[region] = current
+    if stale:
+        get_read_cache().invalidate(region, *stale)
+    return current
+
+@st.cache_resource
+def get_track(region):
+    return pings.Track()
+
+def current_track(region):
+    # Downsampled GPS track, or the last one drawn while Mongo is unreachable.
+    # In an outage the snapshot refreshes probe Mongo, not the page.
+    track = get_track(region)
+    if get_snapshot_store().error(region):
+        return track.last
+    try:
+        return track.refresh(get_region_db(region)["pings"])
+    except pymongo.errors.PyMongoError:
+        return track.last
+
+def newest_position(location, track):
+    # GPS pings win over a hand-entered location unless that is from a later day.
+    if not track or not track["current"]:
+        return location
+    ping = track["current"]
+    if location and str(location.get("date", "")) > ping["time"][:10]:
+        return location
+    return {"name": "Support vehicle (GPS)", "lat": ping["lat"], "lng": ping["lng"], "date": ping["time"]}
+
+def prepared(result):
+    # A background preparation that failed (Mongo down at restart) is dropped
+    # from the cache, so the next run submits it again.
+    return not (isinstance(result, Future) and result.done() and result.exception() is not None)
+
+@st.cache_resource(validate=prepared)
+def prepare_region(region):
+    # Once per process: indexes first, so the backfill and every read can use them.
+    # A region with snapshots was prepared by an earlier process, so a restart
+    # catches up in the background instead of holding the first page.
+    dbs = get_region_db(region)
+    def prepare():
+        indexes.ensure_indexes(dbs)
+        return rollups.backfill_if_missing(dbs)
+    if get_snapshot_store().has(region):
+        return get_snapshot_store().submit(prepare)
+    return prepare()
 
-with st.sidebar:
-    st.header("👨‍💼 Admin Login")
-    
-    
-    st.markdown("### 🌅 East Coast Admin")
-    east_pass = st.text_input("East Password", type="password", key="east_pass")
-    if st.button("🔓 East Login", key="east_login") and east_pass == "EAST123":
-        st.session_state.east_admin = True
-        st.rerun()
-    
-    
-    st.markdown("### 🌊 West Coast Admin")
-    west_pass = st.text_input("West Password", type="password", key="west_pass")
-    if st.button("🔓 West Login", key="west_login") and west_pass == "WEST456":
-        st.session_state.west_admin = True
-        st.rerun()
-    
-    
-    if st.session_state.east_admin:
-        st.success("✅ East Admin Active")
-    if st.session_state.west_admin:
-        st.success("✅ West Admin Active")
-
-
-with east_tab:
-    st.header("🌅 East Coast Team")
-    
-    
-    if st.session_state.east_admin:
-        with st.sidebar.expander("📝 East Coast Entry Forms", expanded=True):
-            
-            with st.form("east_individual"):
-                cyclist = st.selectbox("Select Cyclist", ["Siddhant Goswami", "Sujata Tushir", "Saurabh Yadav", "Kunal Sharma", "Tyarhiikho","Manoj","Kiran Mer","Jyoti Shukla","Pooja Jirwal","Lavanya","Satya Vrat","Belalsen","Saibabu","Duttajit","Monika Sabbu","Durga Charan","Chandra Shekhar","Shriram Meena","Srikanth","Madne Anil","Rajesh","Dinesh","Kunal Shah","Roshan","Mithilesh","Asha","Dhivya","Sivasankari","Hemlatha","Santhya","Balaji","Dasari Mouli","Amisha","Manisha Debnath","Shivani yadav","Mona Singh","Rajani Singh","Rachana","Gujalaramar","Sathish Kumar","Gosula Hareesh","Mude Ramana","Gottipalli Sateesh","Pushpender","Samir Modi","Saurav Sharma","Dora","Manisha Devi","Manju","Rimpa","Manisha","Munna Devi","Manasi","Mohini","Kodigana Bhawani","Pativada Pavani","Jyoti Kumari","Pooja Murmu","Jahnavi","Pallavi","Rahul Meitei","Muttanna","Babita Rani","Rohini M","Abhinaya"])
-                daily_distance = st.number_input("Today's Distance (km)", min_value=0.0, step=0.1)
-                submitted = st.form_submit_button("✅ Log East Distance")
-                if submitted:
-                    dbs = get_east_db()
-                    dbs["individuals"].insert_one({
-                        "cyclist": cyclist,
-                        "date": date.today().isoformat(),
-                        "daily_distance": daily_distance
-                    })
-                    st.success(f"✅ {daily_distance}km logged for {cyclist}!")
-                    st.rerun()
-            
-            
-            with st.form("east_team"):
-                team_distance = st.number_input("Team Total Distance (km)", min_value=0.0, step=1.0)
-                team_speed = st.number_input("Team Avg Speed (km/h)", min_value=0.0, step=0.1)
-                submitted = st.form_submit_button("✅ Log East Team")
-                if submitted:
-                    dbs = get_east_db()
-                    dbs["team"].insert_one({
-                        "date": date.today().isoformat(),
-                        "team_total_distance": team_distance,
-                        "team_avg_speed": team_speed
-                    })
-                    st.success(f"✅ East Team: {team_distance}km @ {team_speed}km/h!")
-                    st.rerun()
-            
-            
-            with st.form("east_location"):
-                location_name = st.text_input("Location Name")
-                latitude = st.number_input("Latitude", value=20.0, min_value=-90.0, max_value=90.0, step=0.0001)
-                longitude = st.number_input("Longitude", value=80.0, min_value=-180.0, max_value=180.0, step=0.0001)
-                submitted = st.form_submit_button("📍 Add East Location")
-                if submitted:
-                    dbs = get_east_db()
-                    dbs["locations"].insert_one({
-                        "name": location_name,
-                        "lat": latitude,
-                        "lng": longitude,
-                        "date": date.today().isoformat()
-                    })
-                    st.success(f"✅ {location_name} added!")
-                    st.rerun()
 
-            with st.form("east_beacon"):
-                beacon_url = st.text_input("Strava Beacon Link", placeholder="https://strava.com/beacon/abc123")
-                submitted = st.form_submit_button("📡 Add Live Tracking")
-                if submitted:
-                    dbs = get_east_db()
-                    dbs["beacons"].insert_one({
-                        "url": beacon_url,
-                        "date": date.today().isoformat(),
-                        "time": datetime.now().isoformat(),
-                        "active": True
-                    })
-                    st.success(f"✅ Live tracking successful")
+def render_entry_forms(region):
+    config = REGIONS[region]
+    with st.sidebar.expander(f"📝 {config['name']} Entry Forms", expanded=True):
+
+        with st.form(f"{region}_individual"):
+            cyclist = st.selectbox("Select Cyclist", config["roster"])
+            daily_distance = st.number_input("Today's Distance (km)", min_value=0.0, step=0.1)
+            submitted = st.form_submit_button(f"✅ Log {config['short']} Distance")
+            if submitted:
+                entry = {
+                    "cyclist": cyclist,
+                    "date": dates.stored(date.today()),
+                    "daily_distance": daily_distance
+                }
+                synced = queue_write(region, "individuals", [entry])
+                st.success(f"✅ {daily_distance}km logged for {cyclist}!" + ("" if synced else QUEUED_NOTE))
+                st.rerun()
+
+
+        with st.form(f"{region}_bulk"):
+            st.markdown("**🗂️ Whole Roster Entry**")
+            bulk_date = st.date_input("Date", value=date.today(), key=f"{region}_bulk_date")
+            grid = st.data_editor(bulk_entry.roster_frame(config["roster"]), hide_index=True, height=300,
+                                  disabled=[bulk_entry.CYCLIST_COLUMN], key=f"{region}_bulk_grid",
+                                  column_config={bulk_entry.DISTANCE_COLUMN: st.column_config.NumberColumn(
+                                      min_value=0.0, max_value=bulk_entry.MAX_DAILY_DISTANCE, step=0.1)})
+            csv_file = st.file_uploader("Or upload a CSV (Cyclist, Distance (km))", type="csv", key=f"{region}_bulk_csv")
+            submitted = st.form_submit_button(f"✅ Log {config['short']} Roster")
+            if submitted:
+                try:
+                    frame = bulk_entry.read_csv(csv_file) if csv_file is not None else grid
+                    entries, problems = bulk_entry.build_entries(frame, config["roster"], bulk_date)
+                except ValueError as e:
+                    entries, problems = [], [f"Could not read CSV: {e}"]
+                if problems:
+                    st.error("\n\n".join(problems))
+                elif not entries:
+                    st.warning("Nothing to log: every distance is 0.")
+                else:
+                    synced = queue_write(region, "individuals", entries)
+                    st.success(f"✅ {len(entries)} distances logged for {bulk_date.isoformat()}!" + ("" if synced else QUEUED_NOTE))
                     st.rerun()
-    
-    
-    col1, col2, col3, col4 = st.columns(4)
+
+
+        with st.form(f"{region}_team"):
+            team_distance = st.number_input("Team Total Distance (km)", min_value=0.0, step=1.0)
+            team_speed = st.number_input("Team Avg Speed (km/h)", min_value=0.0, step=0.1)
+            submitted = st.form_submit_button(f"✅ Log {config['short']} Team")
+            if submitted:
+                entry = {
+                    "date": dates.stored(date.today()),
+                    "team_total_distance": team_distance,
+                    "team_avg_speed": team_speed
+                }
+                synced = queue_write(region, "team", [entry])
+                st.success(f"✅ {config['short']} Team: {team_distance}km @ {team_speed}km/h!" + ("" if synced else QUEUED_NOTE))
+                st.rerun()
+
+
+        with st.form(f"{region}_location"):
+            location_name = st.text_input("Location Name")
+            latitude = st.number_input("Latitude", value=20.0, min_value=-90.0, max_value=90.0, step=0.0001)
+            longitude = st.number_input("Longitude", value=config["default_lng"], min_value=-180.0, max_value=180.0, step=0.0001)
+            submitted = st.form_submit_button(f"📍 Add {config['short']} Location")
+            if submitted:
+                synced = queue_write(region, "locations", [{
+                    "name": location_name,
+                    "lat": latitude,
+                    "lng": longitude,
+                    "date": date.today().isoformat()
+                }])
+                st.success(f"✅ {location_name} added!" + ("" if synced else QUEUED_NOTE))
+                st.rerun()
+
+        with st.form(f"{region}_beacon"):
+            beacon_url = st.text_input("Strava Beacon Link", placeholder="https://strava.com/beacon/abc123")
+            submitted = st.form_submit_button("📡 Add Live Tracking")
+            if submitted:
+                synced = queue_write(region, "beacons", [{
+                    "url": beacon_url,
+                    "date": date.today().isoformat(),
+                    "time": datetime.now().isoformat(),
+                    "active": True
+                }])
+                st.success(f"✅ Live tracking successful" + ("" if synced else QUEUED_NOTE))
+                st.rerun()
+
+
+live_every = LIVE_REFRESH_SECONDS if st.session_state.get("live_updates", True) else None
+
+
+@st.fragment(run_every=live_every)
+def live_metrics(region):
+    config = REGIONS[region]
     try:
-        dbs = get_east_db()
-        team_logs = list(dbs["team"].find().sort("date", -1))
-        individual_logs = list(dbs["individuals"].find().sort("date", -1))
-        
-        if team_logs:
-            df_team = pd.DataFrame(team_logs)
-            df_team['date'] = pd.to_datetime(df_team['date'])
-            df_individual = pd.DataFrame(individual_logs)
-            df_individual['date'] = pd.to_datetime(df_individual['date'])
-            
-            
-            total_distance = df_team['team_total_distance'].sum()
-            avg_speed = df_team['team_avg_speed'].mean().round(1)
-            days_active = len(df_team['date'].dt.date.unique())
-            cyclists = df_individual['cyclist'].nunique() if len(df_individual) > 0 else 0
-            
-            with col1: st.metric("Total Distance", f"{total_distance:.0f} km")
-            with col2: st.metric("Avg Speed", f"{avg_speed} km/h")
-            with col3: st.metric("Days Active", days_active)
+        dbs = get_region_db(region)
+        current = sync_changes(region)
+        # Leaderboard, chart and route are rebuilt only when their data moved,
+        # or once the snapshots they were drawn from have been refreshed.
+        if changes.changed(st.session_state.get(f"{region}_versions", current), current) & HEAVY_COLLECTIONS:
+            st.rerun()
+        if st.session_state.get(f"{region}_from_snapshot") and get_snapshot_store().staleness(region) is None:
+            st.session_state[f"{region}_from_snapshot"] = False
+            st.rerun()
+
+        team_stats = cached_read(region, "daily_totals", "team_summary", lambda: queries.team_summary(dbs["daily_totals"]))
+        if team_stats:
+            cyclists = cached_read(region, "cyclist_totals", "count", lambda: queries.cyclist_count(dbs["cyclist_totals"]))
+            col1, col2, col3, col4 = st.columns(4)
+            with col1: st.metric("Total Distance", f"{team_stats['total_distance']:.0f} km")
+            with col2: st.metric("Avg Speed", f"{team_stats['avg_speed']} km/h")
+            with col3: st.metric("Days Active", team_stats['days_active'])
             with col4: st.metric("Cyclists", cyclists)
-            
-            
-            if len(df_individual) > 0:
-                summary = df_individual.groupby('cyclist')['daily_distance'].sum().round(1).sort_values(ascending=False)
-                st.subheader("👥 East Coast Leaderboard")
-                leaderboard_df = pd.DataFrame({
-                    'Cyclist': summary.index,
-                    'Total (km)': summary.values
-                })
-                st.dataframe(leaderboard_df, width='stretch', height=300)
-
-            st.subheader("📊 Daily Team Distance - Day Numbers")
-            df_daily = df_team.groupby(df_team['date'].dt.date)['team_total_distance'].sum().reset_index()
-            df_daily = df_daily.sort_values('date')  # Oldest first
-            df_daily['day_number'] = range(1, len(df_daily) + 1)
-            df_daily['day_label'] = ['Day ' + str(n) for n in df_daily['day_number']]
-            fig_scatter = px.scatter(
-                df_daily.tail(30),  # Last 30 days
-                x='day_label',
-                y='team_total_distance',
-                size='team_total_distance',  # Bigger dots = more distance
-                size_max=25,color='team_total_distance',color_continuous_scale='Viridis',
-                title="Daily Distance (Day 1, 2, 3...)",
-                hover_data=['date', 'team_total_distance'])
-            fig_scatter.update_traces(texttemplate='%{y:.0f}km',textposition='middle center',textfont_size=12,
-                                      marker=dict(line=dict(width=1.5, color='white')))
-            fig_scatter.update_layout(xaxis_title="Day Number",yaxis_title="Daily Distance (km)",height=450,
-                                      showlegend=False)
-            st.plotly_chart(fig_scatter,width='stretch')
+    except Exception as e:
+        show_data_error(config, e)
 
 
-            st.subheader("📡 Live Tracking Link")
-            beacons = list(dbs["beacons"].find({"active": True}).sort([("date", -1), ("time", -1)]))
-            latest_beacon = beacons[0] if beacons else None
-            if latest_beacon:
-                st.markdown(f"""<a href="{latest_beacon['url']}" target="_blank" style="text-decoration: none;">
-                <button style="background-color: #1f77b4; color: white; padding: 8px 16px; border: none; border-radius: 4px; cursor: pointer;">
-                👁️ VIEW LIVE
-                </button>
-                </a>
-                """, unsafe_allow_html=True)
-            else:
-                st.info("👆 Admin: Add Strava Beacon link")
-
-            
-            
-            
-            st.subheader("🗺️ East Coast Route")
-            route_data = list(dbs["route"].find())
-            admin_locations = list(dbs["locations"].find().sort("date", -1))  # Admin current location
-            latest_admin_loc = admin_locations[0] if admin_locations else None 
-            if route_data or admin_locations:
-                m = folium.Map(location=[15.0, 85.0], zoom_start=6,
-                               tiles='https://mt1.google.com/vt/lyrs=r&x={x}&y={y}&z={z}',
-                               attr='Google')
-                for stop in route_data:
-                    folium.Marker([stop['lat'], stop['lng']],
-                                  popup=f"""
-                                  <b>📍 {stop['name']}</b><br>
-                                  <i>Expected: {stop['date']}</i><br>
-                                  <small>Route checkpoint</small>""",
-                                  tooltip=f"{stop['name']} ({stop['date']})",
-                                  icon=folium.DivIcon(
-                                      html='🚴',
-                                      icon_size=(10,10),
-                                      icon_anchor=(15,15))
-                                 ).add_to(m)
-
-                if latest_admin_loc:
-                    folium.Marker([latest_admin_loc['lat'], latest_admin_loc['lng']],
-                                  popup=f"""
-                                  <b style='color:red'>🎯 CURRENT LOCATION</b><br>
-                                  {latest_admin_loc['name']}<br>
-                                  <small>Reported: {latest_admin_loc.get('date', 'Today')}</small""",
-                                  tooltip="CURRENT POSITION",
-                                  icon=folium.Icon(color='red', icon='info-sign', icon_color='white')
-                                 ).add_to(m)
-
-                if len(route_data) > 1:
-                    folium.PolyLine(locations=[[stop['lat'], stop['lng']] for stop in route_data],
-                                    color="blue",
-                                    weight=4,
-                                    opacity=0.7,
-                                    popup="Planned Route"
-                                   ).add_to(m)
-                    
-                    
-                m.fit_bounds([[8.0, 76.0], [24.0, 89.0]])
-                st_folium(m, width=1200, height=500)
-        
-            else:
-                st.info("👆 East Admin: Add locations using sidebar form")
+@st.fragment(run_every=live_every)
+def live_beacon(region):
+    config = REGIONS[region]
+    try:
+        dbs = get_region_db(region)
+        sync_changes(region)
+        latest_beacon = cached_read(region, "beacons", "latest", lambda: queries.latest_beacon(dbs["beacons"]))
+        if latest_beacon:
+            st.markdown(f"""<a href="{latest_beacon['url']}" target="_blank" style="text-decoration: none;">
+            <button style="background-color: #1f77b4; color: white; padding: 8px 16px; border: none; border-radius: 4px; cursor: pointer;">
+            👁️ VIEW LIVE
+            </button>
+            </a>
+            """, unsafe_allow_html=True)
         else:
-            st.info("👆 East Admin: Log first team entry using sidebar!")
-            
+            st.info("👆 Admin: Add Strava Beacon link")
     except Exception as e:
-        st.error(f"East Coast data error: {str(e)}")
-
-
-with west_tab:
-    st.header("🌊 West Coast Team")
-    
-    
-    if st.session_state.west_admin:
-        with st.sidebar.expander("📝 West Coast Entry Forms", expanded=True):
-            
-            with st.form("west_individual"):
-                cyclist = st.selectbox("Select Cyclist", ["Praveen Kumar", "Nayana B Paul", "Ria Gope", "Bairagi Janardhan Arun", "Sameer Patil","Pushpender","Ramesh Ola","Pooja Jangra","Neeraj Dahia","Rishabh Bhandari","Mahendra Kumar","Layaket Ali","Sanjay Kumar","Lalita Kumari","Tulsi Das","Anuradha Yadav","Bansode Ganesh","Manju Mein","Gagan Yadav","Vignesh","Yashvant Thorat","Sarandev", "Anjali Kumari","Jadeja Nitalba","Arya Krishna","Rahul","Charanya Rutvik","Shridhar","Vaishnav","Ajith Krishnan","Pawan Prakash","Smirthy","Vanishree","Shalu meena","Arunima","Dinesh Yadav","Arun M","Yashkumar","Shinde Vaibhav","Sanjeev Kumar","Sanjay Nair","Anu Kumari","Mansoori","Neeraj Sharma","Varsha","Khushbu","Deepanjali Goya","Rinku","Payal Marve","Pinky","Sapna Rajput","Steffy","Rajeshwari","Geetanjali","Bornita","Shraddha Dhulaji","Bhil Pooja","Jyoti Kumai","Kajal Kushwaha","Alpna","Bharat Kumar","Amardeep","Jadhav","Archna","Shivani"])
-                daily_distance = st.number_input("Today's Distance (km)", min_value=0.0, step=0.1)
-                submitted = st.form_submit_button("✅ Log West Distance")
-                if submitted:
-                    dbs = get_west_db()
-                    dbs["individuals"].insert_one({
-                        "cyclist": cyclist,
-                        "date": date.today().isoformat(),
-                        "daily_distance": daily_distance
-                    })
-                    st.success(f"✅ {daily_distance}km logged for {cyclist}!")
-                    st.rerun()
-            
-            
-            with st.form("west_team"):
-                team_distance = st.number_input("Team Total Distance (km)", min_value=0.0, step=1.0)
-                team_speed = st.number_input("Team Avg Speed (km/h)", min_value=0.0, step=0.1)
-                submitted = st.form_submit_button("✅ Log West Team")
-                if submitted:
-                    dbs = get_west_db()
-                    dbs["team"].insert_one({
-                        "date": date.today().isoformat(),
-                        "team_total_distance": team_distance,
-                        "team_avg_speed": team_speed
-                    })
-                    st.success(f"✅ West Team: {team_distance}km @ {team_speed}km/h!")
-                    st.rerun()
-            
-            
-            with st.form("west_location"):
-                location_name = st.text_input("Location Name")
-                latitude = st.number_input("Latitude", value=20.0, min_value=-90.0, max_value=90.0, step=0.0001)
-                longitude = st.number_input("Longitude", value=72.0, min_value=-180.0, max_value=180.0, step=0.0001)
-                submitted = st.form_submit_button("📍 Add West Location")
-                if submitted:
-                    dbs = get_west_db()
-                    dbs["locations"].insert_one({
-                        "name": location_name,
-                        "lat": latitude,
-                        "lng": longitude,
-                        "date": date.today().isoformat()
-                    })
-                    st.success(f"✅ {location_name} added!")
-                    st.rerun()
+        show_data_error(config, e)
 
-            with st.form("west_beacon"):
-                beacon_url = st.text_input("Strava Beacon Link", placeholder="https://strava.com/beacon/abc123")
-                submitted = st.form_submit_button("📡 Add Live Tracking")
-                if submitted:
-                    dbs = get_west_db()
-                    dbs["beacons"].insert_one({
-                        "url": beacon_url,
-                        "date": date.today().isoformat(),
-                        "time": datetime.now().isoformat(),
-                        "active": True
-                    })
-                    st.success(f"✅ Live tracking successful")
-                    st.rerun()
-            
-    
-    
-    col1, col2, col3, col4 = st.columns(4)
+
+@st.fragment(run_every=live_every)
+def live_route_map(region):
+    # The route layer comes from the cache; a tick only re-reads the current location.
+    config = REGIONS[region]
     try:
-        dbs = get_west_db()
-        team_logs = list(dbs["team"].find().sort("date", -1))
-        individual_logs = list(dbs["individuals"].find().sort("date", -1))
-        
-        if team_logs:
-            df_team = pd.DataFrame(team_logs)
-            df_team['date'] = pd.to_datetime(df_team['date'])
-            df_individual = pd.DataFrame(individual_logs)
-            df_individual['date'] = pd.to_datetime(df_individual['date'])
-            
-            
-            total_distance = df_team['team_total_distance'].sum()
-            avg_speed = df_team['team_avg_speed'].mean().round(1)
-            days_active = len(df_team['date'].dt.date.unique())
-            cyclists = df_individual['cyclist'].nunique() if len(df_individual) > 0 else 0
-            
-            with col1: st.metric("Total Distance", f"{total_distance:.0f} km")
-            with col2: st.metric("Avg Speed", f"{avg_speed} km/h")
-            with col3: st.metric("Days Active", days_active)
-            with col4: st.metric("Cyclists", cyclists)
-            
-            
-            if len(df_individual) > 0:
-                summary = df_individual.groupby('cyclist')['daily_distance'].sum().round(1).sort_values(ascending=False)
-                st.subheader("👥 West Coast Leaderboard")
-                leaderboard_df = pd.DataFrame({
-                    'Cyclist': summary.index,
-                    'Total (km)': summary.values
-                })
-                st.dataframe(leaderboard_df, width='stretch', height=300)
-
-            st.subheader("📊 Daily Team Distance - Day Numbers")
-            df_daily = df_team.groupby(df_team['date'].dt.date)['team_total_distance'].sum().reset_index()
-            df_daily = df_daily.sort_values('date')  # Oldest first
-            df_daily['day_number'] = range(1, len(df_daily) + 1)
-            df_daily['day_label'] = ['Day ' + str(n) for n in df_daily['day_number']]
-            fig_scatter = px.scatter(
-                df_daily.tail(30),  # Last 30 days
-                x='day_label',
-                y='team_total_distance',
-                size='team_total_distance',  # Bigger dots = more distance
-                size_max=25,color='team_total_distance',color_continuous_scale='Viridis',
-                title="Daily Distance (Day 1, 2, 3...)",
-                hover_data=['date', 'team_total_distance'])
-            fig_scatter.update_traces(texttemplate='%{y:.0f}km',textposition='middle center',textfont_size=12,
-                                      marker=dict(line=dict(width=1.5, color='white')))
-            fig_scatter.update_layout(xaxis_title="Day Number",yaxis_title="Daily Distance (km)",height=450,
-                                      showlegend=False)
-            st.plotly_chart(fig_scatter,width='stretch')
-            
-            
+        dbs = get_region_db(region)
+        sync_changes(region)
+        route = cached_read(region, "route", "all", lambda: route_map.load_route(dbs["route"]))
+        latest_admin_loc = cached_read(region, "locations", "latest", lambda: queries.latest_location(dbs["locations"]))  # Admin current location
+        track = current_track(region)
+        current = newest_position(latest_admin_loc, track)
+        if route["stops"] or current:
+            route_map.render_route_map(route, current, center=config["map_center"], bounds=config["map_bounds"],
+                                       key=f"{region}_route_map", static=not st.session_state.interactive_map,
+                                       track=track)
+        else:
+            st.info(f"👆 {config['short']} Admin: Add locations using sidebar form")
+    except Exception as e:
+        show_data_error(config, e)
+
+
+def render_region(region):
+    config = REGIONS[region]
+    st.header(f"{config['icon']} {config['name']} Team")
+    snapshot_badge = st.empty()
+
+    try:
+        dbs = get_region_db(region)
+        prepare_region(region)
+        st.session_state[f"{region}_versions"] = sync_changes(region)
+        with instrumentation.span("metrics"):
+            live_metrics(region)
+        team_stats = cached_read(region, "daily_totals", "team_summary", lambda: queries.team_summary(dbs["daily_totals"]))
+
+        if team_stats:
+            days_active = team_stats['days_active']
+
+
+            with instrumentation.span("leaderboard"):
+                leaderboard = cached_read(region, "cyclist_totals", "leaderboard", lambda: queries.leaderboard(dbs["cyclist_totals"]))
+                if leaderboard:
+                    st.subheader(f"👥 {config['name']} Leaderboard")
+                    leaderboard_df = frames.leaderboard(leaderboard, config["roster"])
+                    st.dataframe(leaderboard_df, width='stretch', height=300,
+                                 column_config={'Total (km)': st.column_config.NumberColumn(format="%.1f")})
+
+            with instrumentation.span("daily_chart"):
+                st.subheader("📊 Daily Team Distance - Day Numbers")
+                df_daily = frames.daily_distance(cached_read(region, "daily_totals", "last_30_days", lambda: queries.daily_team_distance(dbs["daily_totals"], days=30)))  # Last 30 days, oldest first
+                df_daily['date'] = df_daily['date'].dt.date
+                df_daily['day_number'] = range(days_active - len(df_daily) + 1, days_active + 1)
+                df_daily['day_label'] = ['Day ' + str(n) for n in df_daily['day_number']]
+                fig_scatter = px.scatter(
+                    df_daily,
+                    x='day_label',
+                    y='team_total_distance',
+                    size='team_total_distance',  # Bigger dots = more distance
+                    size_max=25,color='team_total_distance',color_continuous_scale='Viridis',
+                    title="Daily Distance (Day 1, 2, 3...)",
+                    hover_data={'date': True, 'team_total_distance': ':.1f'})
+                fig_scatter.update_traces(texttemplate='%{y:.0f}km',textposition='middle center',textfont_size=12,
+                                          marker=dict(line=dict(width=1.5, color='white')))
+                fig_scatter.update_layout(xaxis_title="Day Number",yaxis_title="Daily Distance (km)",height=450,
+                                          showlegend=False)
+                st.plotly_chart(fig_scatter,width='stretch')
+
+
             st.subheader("📡 Live Tracking Link")
-            beacons = list(dbs["beacons"].find({"active": True}).sort([("date", -1), ("time", -1)]))
-            latest_beacon = beacons[0] if beacons else None
-            if latest_beacon:
-                st.markdown(f"""<a href="{latest_beacon['url']}" target="_blank" style="text-decoration: none;">
-                <button style="background-color: #1f77b4; color: white; padding: 8px 16px; border: none; border-radius: 4px; cursor: pointer;">
-                👁️ VIEW LIVE
-                </button>
-                </a>
-                """, unsafe_allow_html=True)
-            else:
-                st.info("👆 Admin: Add Strava Beacon link")
-
-            
-            st.subheader("🗺️ West Coast Route")
-            route_data = list(dbs["route"].find())
-            admin_locations = list(dbs["locations"].find().sort("date", -1))  # Admin current location
-            latest_admin_loc = admin_locations[0] if admin_locations else None 
-            if route_data or admin_locations:
-                m = folium.Map(location=[20.0, 72.0], zoom_start=6,
-                               tiles='https://mt1.google.com/vt/lyrs=r&x={x}&y={y}&z={z}',
-                               attr='Google')
-                for stop in route_data:
-                    folium.Marker([stop['lat'], stop['lng']],
-                                  popup=f"""
-                                  <b>📍 {stop['name']}</b><br>
-                                  <i>Expected: {stop['date']}</i><br>
-                                  <small>Route checkpoint</small>""",
-                                  tooltip=f"{stop['name']} ({stop['date']})",
-                                  icon=folium.DivIcon(
-                                      html='🚴',
-                                      icon_size=(10,10),
-                                      icon_anchor=(15,15))
-                                 ).add_to(m)
-
-                if latest_admin_loc:
-                    folium.Marker([latest_admin_loc['lat'], latest_admin_loc['lng']],
-                                  popup=f"""
-                                  <b style='color:red'>🎯 CURRENT LOCATION</b><br>
-                                  {latest_admin_loc['name']}<br>
-                                  <small>Reported: {latest_admin_loc.get('date', 'Today')}</small""",
-                                  tooltip="CURRENT POSITION",
-                                  icon=folium.Icon(color='red', icon='info-sign', icon_color='white')
-                                 ).add_to(m)
-
-                if len(route_data) > 1:
-                    folium.PolyLine(locations=[[stop['lat'], stop['lng']] for stop in route_data],
-                                    color="blue",
-                                    weight=4,
-                                    opacity=0.7,
-                                    popup="Planned Route"
-                                   ).add_to(m)
-                    
-                    
-                m.fit_bounds([[8.0, 68.0], [24.0, 75.0]])
-                st_folium(m, width=1200, height=500)
-            else:
-                st.info("👆 West Admin: Add locations using sidebar form")
+            with instrumentation.span("beacon"):
+                live_beacon(region)
+
+
+            st.subheader(f"🗺️ {config['name']} Route")
+            with instrumentation.span("route_map"):
+                live_route_map(region)
         else:
-            st.info("👆 West Admin: Log first team entry using sidebar!")
-            
+            st.info(f"👆 {config['short']} Admin: Log first team entry using sidebar!")
+
     except Exception as e:
-        st.error(f"West Coast data error: {str(e)}")
+        show_data_error(config, e)
+
+    # Filled in last, once every section had its chance to fall back to a snapshot.
+    staleness = get_snapshot_store().staleness(region)
+    st.session_state[f"{region}_from_snapshot"] = staleness is not None
+    if staleness:
+        age, error = staleness
+        if error:
+            snapshot_badge.badge(f"Offline: showing data saved {format_age(age)} ago", icon="⚠️", color="red",
+                                 help=f"Mongo is unreachable ({error}). Retrying in the background.")
+        else:
+            snapshot_badge.badge(f"Showing data saved {format_age(age)} ago, refreshing…", icon="🕒", color="orange")
+
+
+def show_data_error(config, e):
+    if isinstance(e, pymongo.errors.PyMongoError):
+        st.error(f"{config['name']}: the database is unreachable and there is no saved data yet. {e}")
+    else:
+        st.error(f"{config['name']} data error: {str(e)}")
+
+
+def format_age(seconds):
+    if seconds < 90:
+        return f"{seconds:.0f}s"
+    if seconds < 90 * 60:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+def render_export():
+    # Admins export their own regions; the file is built only when clicked.
+    regions = [region for region in REGIONS if st.session_state[f"{region}_admin"]]
+    with st.expander("📤 Export History"):
+        collection = st.selectbox("Data", list(export.COLUMNS), key="export_collection",
+                                  format_func={"individuals": "Cyclist logs", "team": "Team logs",
+                                               "locations": "Location history"}.get)
+        fmt = st.radio("Format", export.FORMATS, horizontal=True, key="export_format", format_func=str.upper)
+        period = st.date_input("Dates (leave empty for all)", value=(), key="export_dates")
+        cyclist = None
+        if collection == "individuals":
+            roster = [name for region in regions for name in REGIONS[region]["roster"]]
+            cyclist = st.selectbox("Cyclist", [None] + roster, key="export_cyclist",
+                                   format_func=lambda name: "Everyone" if name is None else name)
+        filters = {"start": period[0] if period else None, "end": period[-1] if period else None, "cyclist": cyclist}
+        st.download_button("⬇️ Download", key="export_download",
+                           data=lambda: export.export_bytes(get_client()[mongo.DB_NAME], collection, fmt, regions, **filters),
+                           file_name=f"cyclothon_{'_'.join(regions)}_{collection}.{fmt}",
+                           mime="text/csv" if fmt == "csv" else "application/vnd.apache.parquet")
+        st.caption("The file is built in memory for the download; for the full history use `python export.py`.")
+
+
+def render_diagnostics(panel, profile):
+    # Filled in after the page ran, so it covers this very run.
+    summary = instrumentation.summarize(profile)
+    commands = summary["commands"].values()
+    panel.caption(f"{sum(c['count'] for c in commands)} Mongo commands, "
+                  f"{sum(c['seconds'] for c in commands) * 1000:.1f} ms, "
+                  f"{sum(c['documents'] for c in commands)} documents returned")
+    panel.dataframe(pd.DataFrame([{"section": name, "ms": round(seconds * 1000, 1)}
+                                  for name, seconds in summary["sections"].items()]),
+                    hide_index=True)
+    if profile["commands"]:
+        panel.dataframe(pd.DataFrame([{"section": c["section"] or "-",
+                                       "command": f"{c['command']} {c['collection']}",
+                                       "ms": round(c["seconds"] * 1000, 2),
+                                       "docs": c["documents"],
+                                       "ok": c["ok"]} for c in profile["commands"]]),
+                        hide_index=True)
+
+
+st.title("🏔️ Cyclothon 2026")
+
+
+# Only the open tab's body runs; switching tabs reruns the script for it.
+region_tabs = st.tabs([f"{config['icon']} {config['name']}" for config in REGIONS.values()],
+                      key="region_tab", on_change="rerun")
+
+
+with st.sidebar:
+    st.toggle("📶 Live updates", value=True, key="live_updates",
+              help=f"Refresh metrics, tracking link and current location every {LIVE_REFRESH_SECONDS}s.")
+    st.toggle("🗺️ Interactive route map", key="interactive_map",
+              help="Moves the current-location marker in place instead of redrawing the map, "
+                   "at the cost of re-rendering the map on every refresh.")
+
+    st.header("👨‍💼 Admin Login")
+
+
+    for region, config in REGIONS.items():
+        st.markdown(f"### {config['icon']} {config['name']} Admin")
+        password = st.text_input(f"{config['short']} Password", type="password", key=f"{region}_pass")
+        if st.button(f"🔓 {config['short']} Login", key=f"{region}_login") and password == config["password"]:
+            st.session_state[f"{region}_admin"] = True
+            st.rerun()
+
+
+    for region, config in REGIONS.items():
+        if st.session_state[f"{region}_admin"]:
+            st.success(f"✅ {config['short']} Admin Active")
+    if any(st.session_state[f"{region}_admin"] for region in REGIONS):
+        cache_stats = get_read_cache().stats()
+        st.caption(f"🗄️ Read cache: {cache_stats['hits']} hits / {cache_stats['misses']} DB reads "
+                   f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} entries)")
+        queue_counts = get_write_queue().counts()
+        st.caption(f"📮 Write queue: {queue_counts['pending']} pending, {queue_counts['failed']} failed")
+        if queue_counts["failed"]:
+            for failure in get_write_queue().failures(limit=5):
+                st.caption(f"⚠️ {failure['region']} {failure['kind']}: {failure['error']}")
+            if st.button("🔁 Retry failed writes", key="retry_writes"):
+                get_write_queue().retry_failed()
+                st.rerun()
+        render_export()
+        diagnostics = st.expander("🩺 Diagnostics")
+        diagnostics.toggle("Record timings", key="diagnostics",
+                           help="Time each section and every Mongo command of this session's page runs.")
+    else:
+        diagnostics = None
+
+
+for region, tab in zip(REGIONS, region_tabs):
+    if st.session_state[f"{region}_admin"]:
+        with instrumentation.span("entry_forms"):
+            render_entry_forms(region)
+    if tab.open:
+        with tab:
+            render_region(region)
+
+profile = instrumentation.end_run()
+if diagnostics is not None and profile is not None:
+    render_diagnostics(diagnostics, profile)
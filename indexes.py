@@ -0,0 +1,95 @@
+"""Index bootstrap for the region collections.
+
+`ensure_indexes` is idempotent and runs once per process before a region
+is first drawn.  `check_plans` explains the dashboard's hot queries and
+reports any that fall back to a collection scan or an in-memory sort:
+
+    python indexes.py --uri mongodb://... --check east west
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+
+import pymongo
+
+import mongo
+import pings
+import queries
+
+
+INDEXES = {
+    "beacons": [[("active", pymongo.ASCENDING), ("date", pymongo.DESCENDING), ("time", pymongo.DESCENDING)]],
+    "locations": [[("date", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]],
+    "individuals": [[("cyclist", pymongo.ASCENDING), ("date", pymongo.DESCENDING)],
+                    [("date", pymongo.DESCENDING)]],
+    "team": [[("date", pymongo.DESCENDING)]],
+    "cyclist_totals": [[("total_distance", pymongo.DESCENDING), ("_id", pymongo.ASCENDING)]],
+    "pings": [[("device", pymongo.ASCENDING), ("start", pymongo.ASCENDING)],
+              [("device", pymongo.ASCENDING), ("ingested", pymongo.ASCENDING)]],
+}
+
+
+def ensure_indexes(dbs):
+    for name, specs in INDEXES.items():
+        for keys in specs:
+            dbs[name].create_index(keys)
+
+
+def hot_queries(dbs):
+    # (label, cursor) for every indexed query the dashboard runs.
+    return [
+        ("latest beacon", dbs["beacons"].find(queries.ACTIVE_BEACON).sort(queries.LATEST_BEACON_SORT).limit(1)),
+        ("latest location", dbs["locations"].find().sort(queries.LATEST_LOCATION_SORT).limit(1)),
+        ("cyclist history", dbs["individuals"].find({"cyclist": ""}).sort("date", pymongo.DESCENDING)),
+        ("team history", dbs["team"].find().sort("date", pymongo.DESCENDING)),
+        ("leaderboard", dbs["cyclist_totals"].find().sort(queries.LEADERBOARD_SORT)),
+        ("ping buckets to refresh", dbs["pings"].find(pings.refresh_query("", 0, datetime.now(timezone.utc)))),
+    ]
+
+
+def plan_stages(plan):
+    # Every "stage" name in an explain() winning plan, outermost first.
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(plan_stages(value))
+    return stages
+
+
+def check_plans(dbs):
+    # [(label, stages, ok)]: ok means an index scan with no blocking sort.
+    results = []
+    for label, cursor in hot_queries(dbs):
+        stages = plan_stages(cursor.explain()["queryPlanner"]["winningPlan"])
+        ok = "IXSCAN" in stages and "COLLSCAN" not in stages and "SORT" not in stages
+        results.append((label, stages, ok))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create Cyclothon indexes and verify query plans.")
+    parser.add_argument("regions", nargs="*", default=["east", "west"])
+    mongo.add_uri_argument(parser)
+    parser.add_argument("--check", action="store_true", help="explain the hot queries and fail on collection scans")
+    args = parser.parse_args(argv)
+
+    db = mongo.connect_args(parser, args)
+    failed = False
+    for region in args.regions:
+        dbs = mongo.region_collections(db, region)
+        ensure_indexes(dbs)
+        print(f"{region}: indexes ready")
+        if args.check:
+            for label, stages, ok in check_plans(dbs):
+                failed = failed or not ok
+                print(f"  {'ok ' if ok else 'BAD'} {label}: {' <- '.join(stages)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Per-section timing spans and Mongo command tracing for the dashboard script.
+
+Recording is off unless `enable()` was called (the benchmark harness does),
+CYCLOTHON_PROFILE is set, or a session asks for it with
+`begin_run(record=True)` (the admin diagnostics panel does).  While off,
+`span()` hands back one shared no-op context manager and the command
+listener returns after a single check, so the hot path stays cheap.
+
+Each recorded run is {"spans": [(name, seconds)], "commands": [...]}, where
+every command is a dict with the section it ran in, its name, collection,
+duration and number of documents returned.  Runs are collected per script
+run (Streamlit runs each session's script in its own thread, and pymongo
+calls listeners on the thread that issued the command) and published to
+`recent_runs` when the run ends.  With CYCLOTHON_PROFILE_LOG set, each run
+is also logged as one JSON line on the "cyclothon.profile" logger, to
+stderr, or appended to a file when the variable holds a path:
+
+    CYCLOTHON_PROFILE=1 CYCLOTHON_PROFILE_LOG=1 streamlit run imagecomparison.py
+    CYCLOTHON_PROFILE=1 CYCLOTHON_PROFILE_LOG=profile.jsonl streamlit run imagecomparison.py
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from pymongo import monitoring
+
+
+# Values of CYCLOTHON_PROFILE_LOG that mean stderr rather than a file name.
+STDERR_TARGETS = ("1", "true", "yes", "stderr")
+
+enabled = bool(os.environ.get("CYCLOTHON_PROFILE"))
+log_runs = False
+recent_runs = deque(maxlen=50)
+logger = logging.getLogger("cyclothon.profile")
+
+_NOOP = contextlib.nullcontext()
+_local = threading.local()
+_handler = None
+
+
+def enable(on=True, log=None):
+    # `log` turns run logging on (True: stderr, or a file path) or off (False).
+    global enabled
+    enabled = on
+    if log is not None:
+        log_to(log)
+
+
+def log_to(target):
+    # Streamlit leaves the root logger at WARNING without handlers, so the
+    # profile logger gets its own handler and level instead of propagating.
+    global log_runs, _handler
+    if _handler is not None:
+        logger.removeHandler(_handler)
+        _handler.close()
+        _handler = None
+    log_runs = bool(target)
+    if not log_runs:
+        return
+    if target is True or str(target).lower() in STDERR_TARGETS:
+        _handler = logging.StreamHandler()
+    else:
+        _handler = logging.FileHandler(target, encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def begin_run(record=False):
+    _local.run = {"spans": [], "commands": []} if enabled or record else None
+    _local.section = None
+    _local.pending = {}
+
+
+def end_run():
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is not None:
+        recent_runs.append(run)
+        if log_runs:
+            logger.info(json.dumps(summarize(run)))
+    return run
+
+
+def span(name):
+    run = getattr(_local, "run", None)
+    if run is None:
+        return _NOOP
+    return _Span(name, run["spans"])
+
+
+def summarize(run):
+    # Seconds per section plus per-command totals, ready for display or logging.
+    sections = {}
+    for name, seconds in run["spans"]:
+        sections[name] = sections.get(name, 0.0) + seconds
+    commands = {}
+    for command in run["commands"]:
+        key = f"{command['command']} {command['collection']}"
+        total = commands.setdefault(key, {"count": 0, "seconds": 0.0, "documents": 0, "failed": 0})
+        total["count"] += 1
+        total["seconds"] += command["seconds"]
+        total["documents"] += command["documents"]
+        total["failed"] += not command["ok"]
+    return {"sections": sections, "commands": commands}
+
+
+class _Span:
+    def __init__(self, name, spans):
+        self.name = name
+        self.spans = spans
+
+    def __enter__(self):
+        self.outer = _local.section
+        _local.section = self.name
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.spans.append((self.name, time.perf_counter() - self.start))
+        _local.section = self.outer
+        return False
+
+
+class CommandListener(monitoring.CommandListener):
+    # Pass an instance to MongoClient(event_listeners=[...]).  Commands issued
+    # outside a recorded run (other threads, fragment reruns) are ignored.
+
+    def started(self, event):
+        if getattr(_local, "run", None) is None:
+            return
+        _local.pending[event.request_id] = (_local.section, _collection(event))
+
+    def succeeded(self, event):
+        self._finish(event, _returned(event.reply), True)
+
+    def failed(self, event):
+        self._finish(event, 0, False)
+
+    def _finish(self, event, documents, ok):
+        run = getattr(_local, "run", None)
+        if run is None:
+            return
+        started = _local.pending.pop(event.request_id, None)
+        if started is None:
+            return
+        section, collection = started
+        run["commands"].append({
+            "section": section,
+            "command": event.command_name,
+            "collection": collection,
+            "seconds": event.duration_micros / 1e6,
+            "documents": documents,
+            "ok": ok,
+        })
+
+
+command_listener = CommandListener()
+
+
+def _collection(event):
+    value = event.command.get(event.command_name)
+    if event.command_name == "getMore":
+        value = event.command.get("collection")
+    return value if isinstance(value, str) else ""
+
+
+def _returned(reply):
+    # Documents shipped back in a cursor batch (find, aggregate, getMore).
+    cursor = reply.get("cursor")
+    if not isinstance(cursor, dict):
+        return 0
+    return len(cursor.get("firstBatch", cursor.get("nextBatch", ())))
+
+
+if os.environ.get("CYCLOTHON_PROFILE_LOG"):
+    log_to(os.environ["CYCLOTHON_PROFILE_LOG"])
@@ -0,0 +1,41 @@
+"""Collection layout of the Cyclothon database."""
+import os
+
+import pymongo
+
+
+DB_NAME = "Cyclothon"
+
+# Every region owns one collection per entry below, named "<region>_<name>".
+COLLECTIONS = (
+    "individuals",
+    "team",
+    "locations",
+    "route",
+    "beacons",
+    "cyclist_totals",
+    "daily_totals",
+    "changes",
+    "pings",
+)
+
+
+def region_collections(db, region):
+    return {name: db[f"{region}_{name}"] for name in COLLECTIONS}
+
+
+def connect(uri):
+    return pymongo.MongoClient(uri)[DB_NAME]
+
+
+def add_uri_argument(parser):
+    # The --uri option every command-line tool takes.
+    parser.add_argument("--uri", default=os.environ.get("MONGO_URI"),
+                        help="MongoDB connection string (default: $MONGO_URI)")
+
+
+def connect_args(parser, args):
+    # The database for parsed arguments; a usage error without a URI.
+    if not args.uri:
+        parser.error("pass --uri or set MONGO_URI")
+    return connect(args.uri)
@@ -0,0 +1,271 @@
+"""GPS pings from the support vehicle, stored in time buckets.
+
+Pings arrive in batches, posted over HTTP or dropped in a directory as
+JSON lines or CSV (t, lat, lng):
+
+    python pings.py serve --uri mongodb://... --port 8765
+    curl -X POST 'localhost:8765/pings?region=east' -d '[{"t": 1767225600, "lat": 15.1, "lng": 80.2}]'
+    python pings.py watch --uri mongodb://... drop/     # files named <region>-anything.jsonl|csv
+    python pings.py ingest --uri mongodb://... east pings.csv
+
+Each `<region>_pings` document holds one device's pings for one
+BUCKET_SECONDS window as parallel t/lat/lng arrays, so a day of 1 Hz pings
+is 24 documents rather than 86,400 and a batch costs one `$push` per
+bucket.  `Track` turns the buckets into the "track so far" for the map:
+closed buckets are simplified once and kept, and each refresh re-reads only
+the bucket that is still filling, plus any older bucket a late upload
+touched since the last refresh.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from pymongo.errors import PyMongoError
+
+import mongo
+import route_geometry
+from regions import REGIONS
+
+
+BUCKET_SECONDS = 3600
+DEFAULT_DEVICE = "support-vehicle"
+# Pings for a bucket may trail in this long after it ends.
+LATE_SECONDS = 120
+# The track drawn on the map never has more vertices than this.
+MAX_TRACK_POINTS = 2000
+REFRESH_SECONDS = 5
+# Concurrent uploads stamp `ingested` in roughly, not exactly, commit order;
+# buckets touched this long before the newest stamp seen are read again.
+INGEST_OVERLAP_SECONDS = 10
+
+
+def parse_ping(raw):
+    # (device, t, lat, lng) from {"t": epoch seconds or ISO time, "lat", "lng", "device"?}.
+    t = raw["t"]
+    if isinstance(t, str):
+        try:
+            t = float(t)
+        except ValueError:
+            parsed = datetime.fromisoformat(t.replace("Z", "+00:00"))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            t = parsed.timestamp()
+    t = float(t)
+    if not math.isfinite(t):
+        raise ValueError(f"time {raw['t']!r} is not a finite number")
+    lat, lng = float(raw["lat"]), float(raw["lng"])
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError(f"position {lat}, {lng} is out of range")
+    return str(raw.get("device") or DEFAULT_DEVICE), t, lat, lng
+
+
+def ingest(pings, batch):
+    # Store parsed pings; one upsert per (device, bucket) touched.
+    buckets = {}
+    for device, t, lat, lng in batch:
+        start = int(t // BUCKET_SECONDS * BUCKET_SECONDS)
+        ts, lats, lngs = buckets.setdefault((device, start), ([], [], []))
+        ts.append(t)
+        lats.append(lat)
+        lngs.append(lng)
+    for (device, start), (ts, lats, lngs) in buckets.items():
+        pings.update_one(
+            {"_id": f"{device}:{start}"},
+            {"$setOnInsert": {"device": device, "start": start},
+             "$push": {"t": {"$each": ts}, "lat": {"$each": lats}, "lng": {"$each": lngs}},
+             "$inc": {"count": len(ts)},
+             "$max": {"last": max(ts)},
+             "$currentDate": {"ingested": True}},
+            upsert=True)
+    return len(batch)
+
+
+def read_file(path):
+    # Parsed pings from a .jsonl (one ping per line) or .csv file.
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            return [parse_ping(row) for row in csv.DictReader(f)]
+        return [parse_ping(json.loads(line)) for line in f if line.strip()]
+
+
+def refresh_query(device, since, ingested):
+    # Buckets from `since` on, and earlier ones uploaded to after `ingested`.
+    query = {"device": device}
+    if since is None:
+        return query
+    if ingested is None:
+        return dict(query, start={"$gte": since})
+    return dict(query, **{"$or": [{"start": {"$gte": since}},
+                                  {"ingested": {"$gt": ingested - timedelta(seconds=INGEST_OVERLAP_SECONDS)}}]})
+
+
+class Track:
+    """Downsampled "track so far" of one device, shared by every session."""
+
+    def __init__(self, device=DEFAULT_DEVICE, zoom=route_geometry.DETAIL_ZOOM, max_points=MAX_TRACK_POINTS):
+        self.device = device
+        self.tolerance = route_geometry.tolerance_for_zoom(zoom)
+        self.max_points = max_points
+        self._lock = threading.Lock()
+        self._closed = {}  # bucket start -> simplified (t, lat, lng) arrays
+        self._open = {}  # bucket start -> raw arrays of a bucket still filling
+        self._checked = 0.0
+        self._ingested = None  # newest `ingested` stamp read so far
+        self._line = None
+
+    @property
+    def last(self):
+        # The line from the latest successful refresh, if any.
+        return self._line
+
+    def refresh(self, pings, now=None, max_age=REFRESH_SECONDS):
+        # Re-reads the open buckets and the closed ones that got late pings (all
+        # buckets the first time) at most every `max_age` seconds.
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._line is not None and now - self._checked < max_age:
+                return self._line
+            since = min(self._open) if self._open else (max(self._closed) + BUCKET_SECONDS if self._closed else None)
+            docs = sorted(pings.find(refresh_query(self.device, since, self._ingested),
+                                     {"start": 1, "t": 1, "lat": 1, "lng": 1, "ingested": 1}),
+                          key=lambda doc: doc["start"])
+            self._open = {}
+            for doc in docs:
+                if doc.get("ingested") and (self._ingested is None or doc["ingested"] > self._ingested):
+                    self._ingested = doc["ingested"]
+                t = np.asarray(doc["t"], dtype=np.float64)
+                order = np.argsort(t, kind="stable")
+                points = t[order], np.asarray(doc["lat"])[order], np.asarray(doc["lng"])[order]
+                if doc["start"] + BUCKET_SECONDS + LATE_SECONDS < now:
+                    self._closed[doc["start"]] = self._simplify(*points)
+                else:
+                    self._open[doc["start"]] = points
+            self._checked = now
+            self._line = self._build()
+            return self._line
+
+    def _simplify(self, t, lat, lng, tolerance=None):
+        keep = route_geometry.simplify(lat, lng, self.tolerance if tolerance is None else tolerance)
+        return t[keep], lat[keep], lng[keep]
+
+    def _build(self):
+        # {"points": [[lat, lng], ...], "current": {...} or None, "version": ...}
+        pieces = [self._closed[start] for start in sorted(self._closed)]
+        pieces += [self._simplify(*self._open[start]) for start in sorted(self._open)]
+        if not pieces:
+            return {"points": [], "current": None, "version": None}
+        t, lat, lng = (np.concatenate(column) for column in zip(*pieces))
+        tolerance = self.tolerance
+        while len(t) > self.max_points:
+            tolerance *= 2
+            t, lat, lng = self._simplify(t, lat, lng, tolerance)
+        current = {"lat": float(lat[-1]), "lng": float(lng[-1]),
+                   "time": datetime.fromtimestamp(t[-1], timezone.utc).isoformat(timespec="seconds")}
+        return {"points": np.column_stack([lat, lng]).tolist(), "current": current,
+                "version": (len(t), float(t[-1]))}
+
+
+def make_server(db, host, port, token=None):
+    # The HTTP endpoint, not yet serving; port 0 picks a free one.
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            url = urlparse(self.path)
+            region = parse_qs(url.query).get("region", [""])[0]
+            if url.path != "/pings" or region not in REGIONS:
+                return self._reply(404, {"error": "POST /pings?region=<region>"})
+            if token and self.headers.get("Authorization") != f"Bearer {token}":
+                return self._reply(401, {"error": "bad token"})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"[]")
+                batch = [parse_ping(raw) for raw in (body if isinstance(body, list) else [body])]
+            except (ValueError, KeyError, TypeError) as e:
+                return self._reply(400, {"error": str(e)})
+            try:
+                stored = ingest(mongo.region_collections(db, region)["pings"], batch)
+            except PyMongoError as e:
+                # The client keeps the batch and posts it again later.
+                return self._reply(503, {"error": str(e)})
+            self._reply(200, {"stored": stored})
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def serve(db, host, port, token=None):
+    server = make_server(db, host, port, token)
+    print(f"listening on http://{host}:{server.server_port}/pings")
+    server.serve_forever()
+
+
+def watch(db, directory, interval=2.0):
+    # Ingest every <region>-*.jsonl|csv dropped in `directory`, then move it
+    # to done/, or to failed/ if it could not be read.
+    for folder in ("done", "failed"):
+        os.makedirs(os.path.join(directory, folder), exist_ok=True)
+    while True:
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path) or not name.endswith((".jsonl", ".csv")):
+                continue
+            region = name.split("-", 1)[0]
+            try:
+                if region not in REGIONS:
+                    raise ValueError(f"unknown region {region!r}")
+                stored = ingest(mongo.region_collections(db, region)["pings"], read_file(path))
+            except (ValueError, KeyError) as e:
+                shutil.move(path, os.path.join(directory, "failed", name))
+                print(f"{name}: {e}")
+                continue
+            shutil.move(path, os.path.join(directory, "done", name))
+            print(f"{name}: {stored} pings")
+        time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest support vehicle GPS pings.")
+    mongo.add_uri_argument(parser)
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="accept pings over HTTP")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--token", default=os.environ.get("CYCLOTHON_PING_TOKEN"),
+                              help="required bearer token (default: $CYCLOTHON_PING_TOKEN)")
+    watch_parser = commands.add_parser("watch", help="ingest files dropped in a directory")
+    watch_parser.add_argument("directory")
+    ingest_parser = commands.add_parser("ingest", help="ingest files once")
+    ingest_parser.add_argument("region", choices=sorted(REGIONS))
+    ingest_parser.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    db = mongo.connect_args(parser, args)
+    if args.command == "serve":
+        serve(db, args.host, args.port, args.token)
+    elif args.command == "watch":
+        watch(db, args.directory)
+    else:
+        pings = mongo.region_collections(db, args.region)["pings"]
+        for path in args.files:
+            print(f"{path}: {ingest(pings, read_file(path))} pings")
+
+
+if __name__ == "__main__":
+    main()
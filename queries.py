@@ -0,0 +1,70 @@
+"""Reads behind the region dashboards.
+
+Totals come from the rollup collections maintained by `rollups`, so the
+cost of a page is O(cyclists + days) documents no matter how many raw logs
+an event accumulates.  "Latest" lookups fetch a single document through
+the indexes created by `indexes`.
+"""
+import pymongo
+
+
+ACTIVE_BEACON = {"active": True}
+LATEST_BEACON_SORT = [("date", pymongo.DESCENDING), ("time", pymongo.DESCENDING)]
+LATEST_LOCATION_SORT = [("date", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]
+LEADERBOARD_SORT = [("total_distance", pymongo.DESCENDING), ("_id", pymongo.ASCENDING)]
+
+
+def team_summary(daily_totals):
+    # Total distance, average speed and distinct days across all team logs.
+    # Returns None when no team entry has been logged yet.
+    rows = list(daily_totals.aggregate([
+        {"$match": {"team_logs": {"$gt": 0}}},
+        {"$group": {
+            "_id": None,
+            "days_active": {"$sum": 1},
+            "logs": {"$sum": "$team_logs"},
+            "total_distance": {"$sum": "$team_distance"},
+            "speed_sum": {"$sum": "$team_speed_sum"},
+        }},
+    ]))
+    if not rows or not rows[0]["logs"]:
+        return None
+    row = rows[0]
+    return {
+        "logs": row["logs"],
+        "total_distance": row["total_distance"],
+        "avg_speed": round(row["speed_sum"] / row["logs"], 1),
+        "days_active": row["days_active"],
+    }
+
+
+def cyclist_count(cyclist_totals):
+    return cyclist_totals.count_documents({})
+
+
+def leaderboard(cyclist_totals, limit=None):
+    # [{"cyclist": ..., "total": ...}] ordered by total distance, highest first.
+    cursor = cyclist_totals.find({}, {"total_distance": 1}).sort(LEADERBOARD_SORT)
+    if limit:
+        cursor = cursor.limit(limit)
+    return [{"cyclist": doc["_id"], "total": round(doc["total_distance"], 1)} for doc in cursor]
+
+
+def daily_team_distance(daily_totals, days=None):
+    # [{"date": ..., "team_total_distance": ...}] oldest day first.  With
+    # `days` set only the most recent days are returned.
+    cursor = daily_totals.find({"team_logs": {"$gt": 0}}, {"team_distance": 1}).sort("_id", -1)
+    if days:
+        cursor = cursor.limit(days)
+    rows = [{"date": doc["_id"], "team_total_distance": doc["team_distance"]} for doc in cursor]
+    rows.reverse()
+    return rows
+
+
+def latest_beacon(beacons):
+    return beacons.find_one(ACTIVE_BEACON, sort=LATEST_BEACON_SORT)
+
+
+def latest_location(locations):
+    # Most recent report; several on one day are told apart by insertion order.
+    return locations.find_one(sort=LATEST_LOCATION_SORT)
@@ -0,0 +1,89 @@
+"""Process-wide TTL cache for dashboard reads.
+
+Entries are keyed by (region, collection, query) and shared by every
+viewer session.  Writes made through the admin forms call `invalidate`
+for the collections they touch, so those changes show up on the next
+rerun instead of after the TTL runs out.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReadCache:
+    def __init__(self, ttl=30.0, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (region, collection, query) -> (expires_at, value)
+        self._loading = {}  # (region, collection, query) -> lock held by the loading session
+        self._generations = {}  # (region, collection or None) -> bumped on every invalidation
+
+    def get(self, region, collection, query, load, ttl=None):
+        # Cached values are shared between sessions; callers must not mutate them.
+        # `ttl` overrides the cache-wide TTL for this entry.
+        key = (region, collection, query)
+        found, value = self._lookup(key)
+        if found:
+            return value
+
+        # Sessions that miss the same key together share one load.
+        with self._loading_lock(key):
+            found, value = self._lookup(key)
+            if found:
+                return value
+            with self._lock:
+                self.misses += 1
+                generation = self._generation(region, collection)
+
+            value = load()
+
+            with self._lock:
+                # A write that landed while we were loading makes this value stale.
+                if self._generation(region, collection) == generation:
+                    self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                self._loading.pop(key, None)
+            return value
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def _loading_lock(self, key):
+        with self._lock:
+            return self._loading.setdefault(key, threading.Lock())
+
+    def invalidate(self, region, *collections):
+        # Without collections every entry of the region is dropped.
+        with self._lock:
+            self.invalidations += 1
+            for key in list(self._entries):
+                if key[0] == region and (not collections or key[1] in collections):
+                    del self._entries[key]
+            for collection in collections or (None,):
+                self._generations[(region, collection)] = self._generations.get((region, collection), 0) + 1
+
+    def _generation(self, region, collection):
+        return self._generations.get((region, None), 0), self._generations.get((region, collection), 0)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+            }
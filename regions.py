@@ -0,0 +1,61 @@
+"""Per-region settings: roster, labels, admin password and map framing.
+
+Adding a region means adding an entry here; the dashboard, the admin forms
+and the Mongo collections ("<region>_<name>") all follow from it.
+"""
+
+
+EAST_ROSTER = [
+    "Siddhant Goswami", "Sujata Tushir", "Saurabh Yadav", "Kunal Sharma", "Tyarhiikho",
+    "Manoj", "Kiran Mer", "Jyoti Shukla", "Pooja Jirwal", "Lavanya", "Satya Vrat",
+    "Belalsen", "Saibabu", "Duttajit", "Monika Sabbu", "Durga Charan",
+    "Chandra Shekhar", "Shriram Meena", "Srikanth", "Madne Anil", "Rajesh", "Dinesh",
+    "Kunal Shah", "Roshan", "Mithilesh", "Asha", "Dhivya", "Sivasankari", "Hemlatha",
+    "Santhya", "Balaji", "Dasari Mouli", "Amisha", "Manisha Debnath", "Shivani yadav",
+    "Mona Singh", "Rajani Singh", "Rachana", "Gujalaramar", "Sathish Kumar",
+    "Gosula Hareesh", "Mude Ramana", "Gottipalli Sateesh", "Pushpender", "Samir Modi",
+    "Saurav Sharma", "Dora", "Manisha Devi", "Manju", "Rimpa", "Manisha", "Munna Devi",
+    "Manasi", "Mohini", "Kodigana Bhawani", "Pativada Pavani", "Jyoti Kumari",
+    "Pooja Murmu", "Jahnavi", "Pallavi", "Rahul Meitei", "Muttanna", "Babita Rani",
+    "Rohini M", "Abhinaya",
+]
+
+WEST_ROSTER = [
+    "Praveen Kumar", "Nayana B Paul", "Ria Gope", "Bairagi Janardhan Arun",
+    "Sameer Patil", "Pushpender", "Ramesh Ola", "Pooja Jangra", "Neeraj Dahia",
+    "Rishabh Bhandari", "Mahendra Kumar", "Layaket Ali", "Sanjay Kumar",
+    "Lalita Kumari", "Tulsi Das", "Anuradha Yadav", "Bansode Ganesh", "Manju Mein",
+    "Gagan Yadav", "Vignesh", "Yashvant Thorat", "Sarandev", "Anjali Kumari",
+    "Jadeja Nitalba", "Arya Krishna", "Rahul", "Charanya Rutvik", "Shridhar",
+    "Vaishnav", "Ajith Krishnan", "Pawan Prakash", "Smirthy", "Vanishree",
+    "Shalu meena", "Arunima", "Dinesh Yadav", "Arun M", "Yashkumar", "Shinde Vaibhav",
+    "Sanjeev Kumar", "Sanjay Nair", "Anu Kumari", "Mansoori", "Neeraj Sharma", "Varsha",
+    "Khushbu", "Deepanjali Goya", "Rinku", "Payal Marve", "Pinky", "Sapna Rajput",
+    "Steffy", "Rajeshwari", "Geetanjali", "Bornita", "Shraddha Dhulaji", "Bhil Pooja",
+    "Jyoti Kumai", "Kajal Kushwaha", "Alpna", "Bharat Kumar", "Amardeep", "Jadhav",
+    "Archna", "Shivani",
+]
+
+
+REGIONS = {
+    "east": {
+        "name": "East Coast",
+        "short": "East",
+        "icon": "🌅",
+        "password": "EAST123",
+        "roster": EAST_ROSTER,
+        "map_center": [15.0, 85.0],
+        "map_bounds": [[8.0, 76.0], [24.0, 89.0]],
+        "default_lng": 80.0,
+    },
+    "west": {
+        "name": "West Coast",
+        "short": "West",
+        "icon": "🌊",
+        "password": "WEST456",
+        "roster": WEST_ROSTER,
+        "map_center": [20.0, 72.0],
+        "map_bounds": [[8.0, 68.0], [24.0, 75.0]],
+        "default_lng": 72.0,
+    },
+}
@@ -0,0 +1,158 @@
+"""Materialized per-cyclist and per-day totals.
+
+`cyclist_totals` holds one document per cyclist and `daily_totals` one per
+date, so the dashboard reads O(cyclists + days) documents instead of every
+log.  The admin forms keep them current with `$inc` upserts next to each
+raw insert; `rebuild` recomputes both from the raw collections.  Each
+totals document lists the raw entry ids it has counted, so an entry whose
+rollup is retried is only ever counted once.
+
+    python rollups.py --uri mongodb://... east west
+"""
+import argparse
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+import dates
+import mongo
+
+
+# Raw entry ids already counted into a totals document.
+APPLIED = "applied"
+DUPLICATE_KEY = 11000
+
+
+def record_individual(dbs, entry):
+    distance = entry["daily_distance"]
+    _apply(dbs["cyclist_totals"], entry["cyclist"], entry["_id"], {"total_distance": distance, "logs": 1})
+    _apply(dbs["daily_totals"], dates.day_key(entry["date"]), entry["_id"],
+           {"individual_distance": distance, "individual_logs": 1})
+
+
+def record_individuals(dbs, entries):
+    # Batched form of record_individual: one bulk write per rollup collection.
+    cyclists, days = {}, {}
+    for entry in entries:
+        for totals, key in ((cyclists, entry["cyclist"]), (days, dates.day_key(entry["date"]))):
+            totals.setdefault(key, []).append(entry)
+    _apply_grouped(dbs["cyclist_totals"], cyclists,
+                   lambda group: {"total_distance": sum(entry["daily_distance"] for entry in group), "logs": len(group)})
+    _apply_grouped(dbs["daily_totals"], days,
+                   lambda group: {"individual_distance": sum(entry["daily_distance"] for entry in group),
+                                  "individual_logs": len(group)})
+
+
+def record_team(dbs, entry):
+    _apply(dbs["daily_totals"], dates.day_key(entry["date"]), entry["_id"],
+           {"team_distance": entry["team_total_distance"], "team_speed_sum": entry["team_avg_speed"], "team_logs": 1})
+
+
+def _apply(collection, key, entry_id, inc):
+    # `$inc` once per raw entry: its id joins the totals' `applied` list in the
+    # same update, so a retried entry matches nothing and the upsert collides.
+    while True:
+        try:
+            collection.update_one({"_id": key, APPLIED: {"$ne": entry_id}},
+                                  {"$inc": inc, "$push": {APPLIED: entry_id}}, upsert=True)
+            return
+        except DuplicateKeyError:
+            # Applied earlier, or another writer created the document first.
+            if collection.count_documents({"_id": key, APPLIED: entry_id}, limit=1):
+                return
+
+
+def _apply_grouped(collection, groups, inc):
+    # One guarded update per key; a key whose batch was partly applied before
+    # (a retry cut differently) collides and is redone entry by entry.
+    if not groups:
+        return
+    keys = list(groups)
+    try:
+        collection.bulk_write([
+            UpdateOne({"_id": key, APPLIED: {"$nin": [entry["_id"] for entry in groups[key]]}},
+                      {"$inc": inc(groups[key]), "$push": {APPLIED: {"$each": [entry["_id"] for entry in groups[key]]}}},
+                      upsert=True)
+            for key in keys], ordered=False)
+    except BulkWriteError as e:
+        if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+            raise
+        for error in e.details["writeErrors"]:
+            key = keys[error["index"]]
+            for entry in groups[key]:
+                _apply(collection, key, entry["_id"], inc([entry]))
+
+
+def rebuild(dbs):
+    cyclists = list(dbs["individuals"].aggregate([
+        {"$match": {"cyclist": {"$ne": None}}},
+        {"$group": {"_id": "$cyclist",
+                    "total_distance": {"$sum": "$daily_distance"},
+                    "logs": {"$sum": 1},
+                    APPLIED: {"$push": "$_id"}}},
+    ]))
+
+    # Days are keyed by their ISO string, so logs of one day merge whether
+    # they store the date as a string or as a BSON date.
+    days = {}
+    for row in dbs["team"].aggregate([
+        {"$group": {"_id": "$date",
+                    "team_distance": {"$sum": "$team_total_distance"},
+                    "team_speed_sum": {"$sum": "$team_avg_speed"},
+                    "team_logs": {"$sum": 1},
+                    APPLIED: {"$push": "$_id"}}},
+    ]):
+        _add(days, row)
+    for row in dbs["individuals"].aggregate([
+        {"$group": {"_id": "$date",
+                    "individual_distance": {"$sum": "$daily_distance"},
+                    "individual_logs": {"$sum": 1},
+                    APPLIED: {"$push": "$_id"}}},
+    ]):
+        _add(days, row)
+
+    _replace_all(dbs["cyclist_totals"], cyclists)
+    _replace_all(dbs["daily_totals"], list(days.values()))
+    return len(cyclists), len(days)
+
+
+def backfill_if_missing(dbs):
+    # Deployments that predate the rollups have raw logs but no totals yet.
+    if dbs["daily_totals"].find_one({}, {"_id": 1}) is not None:
+        return False
+    if (dbs["team"].find_one({}, {"_id": 1}) is None
+            and dbs["individuals"].find_one({}, {"_id": 1}) is None):
+        return False
+    rebuild(dbs)
+    return True
+
+
+def _add(days, row):
+    key = dates.day_key(row.pop("_id"))
+    day = days.setdefault(key, {"_id": key})
+    for field, value in row.items():
+        # Sums add up and the `applied` id lists concatenate.
+        day[field] = day.get(field, type(value)()) + value
+
+
+def _replace_all(collection, docs):
+    # Upsert first and prune afterwards so readers never see an empty rollup.
+    for doc in docs:
+        collection.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+    collection.delete_many({"_id": {"$nin": [doc["_id"] for doc in docs]}})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild Cyclothon rollup collections from raw logs.")
+    parser.add_argument("regions", nargs="*", default=["east", "west"])
+    mongo.add_uri_argument(parser)
+    args = parser.parse_args(argv)
+
+    db = mongo.connect_args(parser, args)
+    for region in args.regions:
+        cyclists, days = rebuild(mongo.region_collections(db, region))
+        print(f"{region}: {cyclists} cyclists, {days} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Geometry helpers for drawing long GPS tracks on the route map.
+
+A recorded track can hold tens of thousands of points, far more than a
+browser needs to draw a line a few hundred pixels long.  `simplify` runs
+Douglas-Peucker over NumPy arrays, one pass per recursion level for all
+pending segments at once, with a tolerance derived from the map zoom.
+"""
+import numpy as np
+
+
+# Zoom level the simplified line should stay pixel-accurate at.  Zooming in
+# further than this shows the line slightly smoothed.
+DETAIL_ZOOM = 11
+
+# Above this many checkpoint markers they are grouped into clusters, and
+# beyond MAX_MARKERS they are evenly subsampled.
+CLUSTER_THRESHOLD = 50
+MAX_MARKERS = 500
+
+
+def tolerance_for_zoom(zoom, pixels=1.0):
+    # Degrees of longitude covered by `pixels` screen pixels at `zoom` on a
+    # 256px Web Mercator tile pyramid.
+    return pixels * 360.0 / (256 * 2 ** zoom)
+
+
+def simplify(lat, lng, tolerance):
+    # Indices of the points to keep, in track order.  The first and last
+    # points are always kept.
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    n = len(lat)
+    if n < 3:
+        return np.arange(n)
+
+    # Work in a locally equal-area plane so east-west and north-south
+    # deviations are measured alike.
+    x = lng * np.cos(np.radians(lat.mean()))
+    y = lat
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    starts = np.array([0])
+    ends = np.array([n - 1])
+
+    while len(starts):
+        interior = ends - starts - 1
+        pending = interior > 0
+        starts, ends, interior = starts[pending], ends[pending], interior[pending]
+        if not len(starts):
+            break
+
+        # Flatten every pending segment's interior points into one array.
+        first = np.cumsum(interior) - interior
+        segment = np.repeat(np.arange(len(starts)), interior)
+        index = np.repeat(starts + 1, interior) + np.arange(interior.sum()) - np.repeat(first, interior)
+
+        x0, y0 = x[starts][segment], y[starts][segment]
+        dx, dy = x[ends][segment] - x0, y[ends][segment] - y0
+        px, py = x[index] - x0, y[index] - y0
+        length = np.hypot(dx, dy)
+        distance = np.where(length > 0,
+                            np.abs(dx * py - dy * px) / np.where(length > 0, length, 1.0),
+                            np.hypot(px, py))
+
+        # Farthest point of each segment (first one on ties).
+        farthest = np.maximum.reduceat(distance, first)
+        hits = np.flatnonzero(distance == farthest[segment])
+        _, first_hit = np.unique(segment[hits], return_index=True)
+        split = index[hits[first_hit]]
+
+        split_further = farthest > tolerance
+        split = split[split_further]
+        keep[split] = True
+        starts = np.concatenate([starts[split_further], split])
+        ends = np.concatenate([split, ends[split_further]])
+
+    return np.flatnonzero(keep)
+
+
+def polyline_indices(stops, zoom=DETAIL_ZOOM):
+    # Simplified track that still passes through every named checkpoint.
+    if not stops:
+        return np.arange(0)
+    lat = np.fromiter((stop['lat'] for stop in stops), dtype=np.float64, count=len(stops))
+    lng = np.fromiter((stop['lng'] for stop in stops), dtype=np.float64, count=len(stops))
+    kept = simplify(lat, lng, tolerance_for_zoom(zoom))
+    named = [i for i, stop in enumerate(stops) if stop.get('name')]
+    return np.union1d(kept, np.asarray(named, dtype=kept.dtype))
+
+
+def checkpoint_indices(stops, max_markers=MAX_MARKERS):
+    # Only named stops get a marker; raw GPS fixes are just part of the line.
+    named = np.asarray([i for i, stop in enumerate(stops) if stop.get('name')], dtype=np.int64)
+    if len(named) <= max_markers:
+        return named
+    picks = np.unique(np.linspace(0, len(named) - 1, max_markers).round().astype(np.int64))
+    return named[picks]
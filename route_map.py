@@ -0,0 +1,117 @@
+"""Route map rendering.
+
+The route (checkpoint markers and the planned polyline) only changes when
+an admin edits it.  Its simplified geometry is computed once per route
+version, and the static map's HTML is rendered once per route version and
+current location, then shared by every session.  Long recorded tracks are
+simplified by `route_geometry` before they reach the browser.
+
+folium mutates a map while rendering it, so no `folium.Map` is ever shared
+between reruns; only plain data and rendered HTML are cached.
+"""
+import hashlib
+import json
+
+import folium
+from folium.plugins import MarkerCluster
+import streamlit as st
+from streamlit_folium import st_folium
+
+import route_geometry
+
+
+TILES = 'https://mt1.google.com/vt/lyrs=r&x={x}&y={y}&z={z}'
+
+
+def load_route(route):
+    # {"version": ..., "stops": [...]} where the version changes with any stop.
+    stops = list(route.find({}, {"_id": 0, "name": 1, "date": 1, "lat": 1, "lng": 1}))
+    key = json.dumps([[stop.get('name'), stop.get('date'), stop['lat'], stop['lng']] for stop in stops], default=str)
+    return {"version": hashlib.sha1(key.encode()).hexdigest(), "stops": stops}
+
+
+def render_route_map(route, location, center, bounds, key, static=True, track=None, width=1200, height=500):
+    # Static maps are cached HTML: nothing is rendered per rerun, there is no
+    # component round trip, and panning never reruns the script.  The
+    # interactive st_folium map re-renders per rerun but keeps the map mounted
+    # and only swaps the current-location layer.  `track` is a downsampled
+    # `pings.Track` line, drawn under the current-location marker.
+    center, bounds = tuple(center), tuple(tuple(corner) for corner in bounds)
+    track_points = track["points"] if track else []
+    if static:
+        location_key = None if location is None else (location['lat'], location['lng'], location.get('name'), location.get('date'))
+        html = _static_html(route["version"], location_key, track["version"] if track else None,
+                            route["stops"], location, track_points, center, bounds)
+        st.iframe(html, width=width, height=height)
+        return
+
+    m = _route_layer(_route_shape(route["version"], route["stops"]), center, bounds)
+    layer = folium.FeatureGroup(name="Current location")
+    if len(track_points) > 1:
+        _track_line(track_points).add_to(layer)
+    if location:
+        _current_location_marker(location).add_to(layer)
+    st_folium(m, key=key, width=width, height=height, feature_group_to_add=layer, returned_objects=[])
+
+
+@st.cache_resource(max_entries=8)
+def _route_shape(version, _stops):
+    # Plain data only: the checkpoints that get a marker and the simplified line.
+    return {
+        "checkpoints": [_stops[i] for i in route_geometry.checkpoint_indices(_stops)],
+        "line": [[_stops[i]['lat'], _stops[i]['lng']] for i in route_geometry.polyline_indices(_stops)],
+    }
+
+
+@st.cache_data(max_entries=16)
+def _static_html(version, location_key, track_key, _stops, _location, _track_points, center, bounds):
+    m = _route_layer(_route_shape(version, _stops), center, bounds)
+    if len(_track_points) > 1:
+        _track_line(_track_points).add_to(m)
+    if _location:
+        _current_location_marker(_location).add_to(m)
+    return m.get_root().render()
+
+
+def _route_layer(shape, center, bounds):
+    m = folium.Map(location=list(center), zoom_start=6, tiles=TILES, attr='Google')
+    marker_layer = m
+    if len(shape["checkpoints"]) > route_geometry.CLUSTER_THRESHOLD:
+        marker_layer = MarkerCluster(name="Checkpoints").add_to(m)
+    for stop in shape["checkpoints"]:
+        folium.Marker([stop['lat'], stop['lng']],
+                      popup=f"""
+                      <b>📍 {stop['name']}</b><br>
+                      <i>Expected: {stop.get('date', '')}</i><br>
+                      <small>Route checkpoint</small>""",
+                      tooltip=f"{stop['name']} ({stop.get('date', '')})",
+                      icon=folium.DivIcon(
+                          html='🚴',
+                          icon_size=(10,10),
+                          icon_anchor=(15,15))
+                     ).add_to(marker_layer)
+
+    if len(shape["line"]) > 1:
+        folium.PolyLine(locations=shape["line"],
+                        color="blue",
+                        weight=4,
+                        opacity=0.7,
+                        popup="Planned Route"
+                       ).add_to(m)
+
+    m.fit_bounds([list(corner) for corner in bounds])
+    return m
+
+
+def _track_line(points):
+    return folium.PolyLine(locations=points, color="red", weight=3, opacity=0.8, tooltip="Track so far")
+
+
+def _current_location_marker(location):
+    return folium.Marker([location['lat'], location['lng']],
+                         popup=f"""
+                         <b style='color:red'>🎯 CURRENT LOCATION</b><br>
+                         {location['name']}<br>
+                         <small>Reported: {location.get('date', 'Today')}</small>""",
+                         tooltip="CURRENT POSITION",
+                         icon=folium.Icon(color='red', icon='info-sign', icon_color='white'))
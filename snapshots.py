@@ -0,0 +1,178 @@
+"""Last-known-good dashboard data on local disk.
+
+Every dashboard read that reaches Mongo is also saved as an Arrow IPC file,
+one per (region, query), with the time it was read.  When a process starts
+cold, or Mongo stops answering, reads are served from those files at once
+and refreshed in the background; `staleness` tells the page how old the
+oldest value it is showing is, so it can say so.
+
+    reads = SnapshotStore("snapshots")
+    value = reads.read("east", "leaderboard", load, refreshed)
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+import pyarrow.ipc
+from bson import ObjectId
+
+
+SNAPSHOT_DIR = os.environ.get("CYCLOTHON_SNAPSHOTS", "snapshots")
+
+# How a value was flattened into a table, kept in the file's metadata.
+_ROWS, _RECORD, _SCALAR, _NONE = b"rows", b"record", b"scalar", b"none"
+
+
+class SnapshotStore:
+    def __init__(self, directory=None, workers=2):
+        self.directory = directory or SNAPSHOT_DIR
+        self._lock = threading.Lock()
+        self._live = set()  # keys read from Mongo by this process
+        self._serving = {}  # key -> saved_at of the snapshot standing in for it
+        self._fresh = {}  # key -> value a background refresh brought in
+        self._refreshing = set()
+        self._errors = {}  # region -> last failed read, until one succeeds
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snapshot-refresh")
+
+    def read(self, region, query, load, refreshed=None):
+        # The value of `load()`, or its last saved value while Mongo catches up.
+        # `refreshed()` runs once a background refresh replaced a saved value.
+        key = (region, query)
+        with self._lock:
+            if key in self._fresh:
+                return self._fresh.pop(key)
+            # While the region's Mongo is failing, only the background refresh
+            # tries it; the page gets saved values without waiting on a timeout.
+            live = key in self._live and key not in self._serving and region not in self._errors
+
+        if live:
+            try:
+                return self._load(key, load)
+            except Exception as e:
+                with self._lock:
+                    self._errors[region] = str(e)
+                saved = self.load(region, query)
+                if saved is None:
+                    raise
+        else:
+            saved = self.load(region, query)
+            if saved is None:
+                return self._load(key, load)
+
+        value, saved_at = saved
+        with self._lock:
+            self._serving[key] = saved_at
+            if key in self._refreshing:
+                return value
+            self._refreshing.add(key)
+        self._pool.submit(self._refresh, key, load, refreshed)
+        return value
+
+    def _load(self, key, load):
+        value = load()
+        try:
+            self.save(*key, value)
+        except (pa.ArrowException, OSError):
+            # Unsaveable values (mixed types, full disk) are still served.
+            pass
+        with self._lock:
+            self._live.add(key)
+            self._errors.pop(key[0], None)
+        return value
+
+    def _refresh(self, key, load, refreshed):
+        try:
+            value = self._load(key, load)
+        except Exception as e:
+            with self._lock:
+                self._errors[key[0]] = str(e)
+                self._refreshing.discard(key)
+            return
+        with self._lock:
+            self._fresh[key] = value
+            self._serving.pop(key, None)
+            self._refreshing.discard(key)
+        if refreshed:
+            refreshed()
+
+    def staleness(self, region):
+        # (seconds since the oldest snapshot on show was saved, last refresh error),
+        # or None when everything shown came from Mongo.
+        with self._lock:
+            saved = [saved_at for (r, _), saved_at in self._serving.items() if r == region]
+            if not saved:
+                return None
+            return time.time() - min(saved), self._errors.get(region)
+
+    def error(self, region):
+        # The region's last failed read from Mongo, None once one succeeds again.
+        with self._lock:
+            return self._errors.get(region)
+
+    def has(self, region):
+        directory = os.path.join(self.directory, region)
+        return os.path.isdir(directory) and any(name.endswith(".arrow") for name in os.listdir(directory))
+
+    def submit(self, fn, *args):
+        # Run other background catch-up work on the refresh threads.
+        return self._pool.submit(fn, *args)
+
+    def save(self, region, query, value):
+        table, kind = _to_table(value)
+        table = table.replace_schema_metadata({b"kind": kind, b"saved_at": str(time.time()).encode()})
+        path = self._path(region, query)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write beside the old file and swap, so readers never see half a file.
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with pa.OSFile(temporary, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(temporary, path)
+
+    def load(self, region, query):
+        # (value, saved_at) or None when nothing was saved yet.
+        try:
+            with pa.memory_map(self._path(region, query)) as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        metadata = table.schema.metadata or {}
+        return _from_table(table, metadata.get(b"kind")), float(metadata.get(b"saved_at", 0))
+
+    def _path(self, region, query):
+        return os.path.join(self.directory, region, re.sub(r"[^\w.-]", "_", query) + ".arrow")
+
+
+def _to_table(value):
+    if value is None:
+        return pa.table({}), _NONE
+    if isinstance(value, list):
+        return pa.Table.from_pylist([_plain(row) for row in value]), _ROWS
+    if isinstance(value, dict):
+        return pa.Table.from_pylist([_plain(value)]), _RECORD
+    return pa.table({"value": [_plain(value)]}), _SCALAR
+
+
+def _from_table(table, kind):
+    if kind == _NONE:
+        return None
+    rows = table.to_pylist()
+    if kind == _ROWS:
+        return rows
+    if kind == _RECORD:
+        # A table without columns has no rows either, e.g. for {}.
+        return rows[0] if rows else {}
+    return rows[0]["value"]
+
+
+def _plain(value):
+    # Arrow has no ObjectId type; the dashboard only ever displays ids.
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
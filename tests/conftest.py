@@ -0,0 +1,43 @@
+"""Shared test setup.
+
+mongomock 4.3 cannot take the `UpdateOne` requests of pymongo 4.11 and
+later (they carry a `sort` it does not know), which would leave the
+batched rollups untested.  Every mongomock collection here applies them
+one by one through `update_one` instead, reporting duplicate keys the way
+an unordered `bulk_write` does.
+"""
+import mongomock
+import pytest
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.results import BulkWriteResult
+
+
+def bulk_write(collection, requests, ordered=True, **kwargs):
+    matched = modified = 0
+    upserted, write_errors = {}, []
+    for index, request in enumerate(requests):
+        if not isinstance(request, UpdateOne):
+            raise NotImplementedError(f"tests only fake UpdateOne, not {type(request).__name__}")
+        try:
+            result = collection.update_one(request._filter, request._doc, upsert=request._upsert)
+        except DuplicateKeyError as e:
+            write_errors.append({"index": index, "code": e.code, "errmsg": str(e)})
+            if ordered:
+                break
+            continue
+        matched += result.matched_count
+        modified += result.modified_count
+        if result.upserted_id is not None:
+            upserted[index] = result.upserted_id
+    details = {"nMatched": matched, "nModified": modified, "nUpserted": len(upserted),
+               "upserted": [{"index": index, "_id": _id} for index, _id in upserted.items()],
+               "writeErrors": write_errors, "writeConcernErrors": [], "nInserted": 0, "nRemoved": 0}
+    if write_errors:
+        raise BulkWriteError(details)
+    return BulkWriteResult(details, True)
+
+
+@pytest.fixture(autouse=True)
+def update_one_bulk_writes(monkeypatch):
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", bulk_write)
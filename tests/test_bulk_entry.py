@@ -0,0 +1,68 @@
+"""Whole-roster entry validation: nothing is written while problems remain.
+
+    python -m pytest tests
+"""
+import io
+import math
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import bulk_entry
+import dates
+
+
+ROSTER = ["Asha", "Bharat", "Chitra"]
+DAY = date(2026, 1, 4)
+
+
+def grid(rows):
+    return pd.DataFrame(rows, columns=[bulk_entry.CYCLIST_COLUMN, bulk_entry.DISTANCE_COLUMN])
+
+
+def test_valid_grid_becomes_entries():
+    entries, problems = bulk_entry.build_entries(grid([("Asha", 42.5), ("Bharat", 0.0), (" Chitra ", "12")]), ROSTER, DAY)
+    assert problems == []
+    assert entries == [{"cyclist": "Asha", "date": dates.stored(DAY), "daily_distance": 42.5},
+                       {"cyclist": "Chitra", "date": dates.stored(DAY), "daily_distance": 12.0}]
+
+
+def test_all_zero_grid_has_nothing_to_write():
+    assert bulk_entry.build_entries(bulk_entry.roster_frame(ROSTER), ROSTER, DAY) == ([], [])
+
+
+@pytest.mark.parametrize("rows, problem", [
+    ([("Zed", 10.0)], "Row 1: Zed is not on the roster"),
+    ([(None, 10.0)], "Row 1: blank name is not on the roster"),
+    ([("Asha", 10.0), ("Asha", 5.0)], "Row 2: Asha appears more than once"),
+    ([("Asha", math.inf)], "Row 1: infkm for Asha is outside 0-500km"),
+    ([("Asha", "inf")], "Row 1: infkm for Asha is outside 0-500km"),
+    ([("Asha", 500.1)], "Row 1: 500.1km for Asha is outside 0-500km"),
+    ([("Asha", -3.0)], "Row 1: -3.0km for Asha is outside 0-500km"),
+    ([("Asha", "ten")], "Row 1: distance 'ten' is not a number"),
+])
+def test_problems_are_reported_by_row(rows, problem):
+    entries, problems = bulk_entry.build_entries(grid(rows), ROSTER, DAY)
+    assert problem in problems
+
+
+def test_blank_and_nan_distances_are_skipped():
+    entries, problems = bulk_entry.build_entries(grid([("Asha", math.nan), ("Bharat", ""), ("Zed", None)]), ROSTER, DAY)
+    assert (entries, problems) == ([], [])
+
+
+def test_limit_itself_is_allowed():
+    entries, problems = bulk_entry.build_entries(grid([("Asha", bulk_entry.MAX_DAILY_DISTANCE)]), ROSTER, DAY)
+    assert problems == [] and entries[0]["daily_distance"] == bulk_entry.MAX_DAILY_DISTANCE
+
+
+def test_csv_headers_are_matched_loosely():
+    frame = bulk_entry.read_csv(io.StringIO("cyclist, Distance \nAsha,10\nChitra,\n"))
+    entries, problems = bulk_entry.build_entries(frame, ROSTER, DAY)
+    assert problems == [] and [entry["cyclist"] for entry in entries] == ["Asha"]
+
+
+def test_csv_without_a_distance_column_is_refused():
+    with pytest.raises(ValueError, match="Distance"):
+        bulk_entry.read_csv(io.StringIO("Cyclist,km\nAsha,10\n"))
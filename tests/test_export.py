@@ -0,0 +1,68 @@
+"""History export over logs whose dates are stored both ways.
+
+    python -m pytest tests
+"""
+import csv
+import io
+from datetime import date, datetime
+
+import mongomock
+import pyarrow.parquet as pq
+import pytest
+
+import export
+import mongo
+
+
+DAYS = [("2026-01-01", "Asha"), (datetime(2026, 1, 2), "Bharat"), ("2026-01-03", "Chitra"),
+        (datetime(2026, 1, 4, 9, 30), "Asha"), ("2026-01-05", "Bharat"), (datetime(2026, 1, 6), "Chitra")]
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient()[mongo.DB_NAME]
+    logs = mongo.region_collections(db, "east")["individuals"]
+    # Inserted out of order, so neither _id nor insertion order gives the dates.
+    for day, cyclist in reversed(DAYS):
+        logs.insert_one({"cyclist": cyclist, "date": day, "daily_distance": 10.0})
+    return db
+
+
+def rows(db, **filters):
+    out = io.StringIO()
+    export.export(db, "individuals", "csv", out, ["east"], **filters)
+    return list(csv.DictReader(io.StringIO(out.getvalue())))
+
+
+def test_export_is_in_date_order_across_storage_forms(db):
+    assert [row["date"] for row in rows(db)] == [f"2026-01-0{n}" for n in range(1, 7)]
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    (date(2026, 1, 2), date(2026, 1, 4), ["2026-01-02", "2026-01-03", "2026-01-04"]),
+    (date(2026, 1, 4), None, ["2026-01-04", "2026-01-05", "2026-01-06"]),
+    (None, date(2026, 1, 1), ["2026-01-01"]),
+    (date(2026, 1, 4), date(2026, 1, 4), ["2026-01-04"]),
+])
+def test_date_range_matches_strings_and_bson_dates(db, start, end, expected):
+    # The end day is inclusive for a BSON date with a time of day too.
+    assert [row["date"] for row in rows(db, start=start, end=end)] == expected
+
+
+def test_cyclist_filter_combines_with_the_range(db):
+    found = rows(db, start=date(2026, 1, 2), cyclist="Asha")
+    assert [(row["cyclist"], row["date"]) for row in found] == [("Asha", "2026-01-04")]
+
+
+def test_logs_without_a_date_are_exported_first(db):
+    mongo.region_collections(db, "east")["individuals"].insert_one({"cyclist": "Dev", "daily_distance": 5.0})
+    assert [row["date"] for row in rows(db)][:2] == ["", "2026-01-01"]
+
+
+def test_export_bytes_builds_the_same_parquet(db, tmp_path):
+    data = export.export_bytes(db, "individuals", "parquet", ["east"], start=date(2026, 1, 3))
+    path = tmp_path / "east.parquet"
+    path.write_bytes(data)
+    table = pq.read_table(path)
+    assert table.column_names == ["region", "cyclist", "date", "daily_distance"]
+    assert [day.isoformat() for day in table.column("date").to_pylist()] == [f"2026-01-0{n}" for n in range(3, 7)]
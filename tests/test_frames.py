@@ -0,0 +1,25 @@
+"""Column building in `frames`.
+
+    python -m pytest tests
+"""
+from datetime import datetime
+
+import numpy as np
+
+import frames
+
+
+def test_date_column_takes_every_stored_form():
+    values = ["2026-01-04", "2026-01-04T10:00:00", datetime(2026, 1, 5, 3), "2026-01-06T23:30:00+05:30", None, "garbage"]
+    days = frames.date_column(values)
+    assert days.dtype.kind == "M"
+    assert list(days[:4].astype("datetime64[D]")) == [np.datetime64(day) for day in ("2026-01-04", "2026-01-04", "2026-01-05", "2026-01-06")]
+    assert np.isnat(days[4]) and np.isnat(days[5])
+
+
+def test_daily_distance_keeps_row_order():
+    rows = [{"date": "2026-01-04", "team_total_distance": 120.5},
+            {"date": datetime(2026, 1, 5), "team_total_distance": 80.0}]
+    df = frames.daily_distance(rows)
+    assert list(df["date"].dt.strftime("%Y-%m-%d")) == ["2026-01-04", "2026-01-05"]
+    assert df["team_total_distance"].dtype == np.float32
@@ -0,0 +1,50 @@
+"""Query plans of the dashboard's hot queries.
+
+    MONGO_URI=mongodb://localhost:27017 python -m pytest tests/test_indexes.py
+
+mongomock cannot explain a query, so the plan check runs only against a
+real server given by $MONGO_URI.  It works in a scratch database that is
+dropped afterwards.
+"""
+import os
+import uuid
+
+import pymongo
+import pytest
+
+import indexes
+import mongo
+import pings
+from benchmarks import synthetic
+
+
+@pytest.fixture
+def dbs():
+    uri = os.environ.get("MONGO_URI")
+    if not uri:
+        pytest.skip("set MONGO_URI to a MongoDB server to explain query plans")
+    client = pymongo.MongoClient(uri, serverSelectionTimeoutMS=5000)
+    db = client[f"{mongo.DB_NAME}_test_{uuid.uuid4().hex[:8]}"]
+    try:
+        synthetic.seed(db, regions=("east",), cyclists=10, days=5)
+        dbs = mongo.region_collections(db, "east")
+        pings.ingest(dbs["pings"], [(pings.DEFAULT_DEVICE, 1_767_225_600 + 60 * n, 15.0, 80.0) for n in range(300)])
+        yield dbs
+    finally:
+        client.drop_database(db.name)
+        client.close()
+
+
+def test_hot_queries_use_indexes(dbs):
+    indexes.ensure_indexes(dbs)
+    # Idempotent: a second run over existing indexes changes nothing.
+    indexes.ensure_indexes(dbs)
+    results = indexes.check_plans(dbs)
+    assert [label for label, _, _ in results] == [label for label, _ in indexes.hot_queries(dbs)]
+    assert [(label, stages) for label, stages, ok in results if not ok] == []
+
+
+def test_plan_stages_walks_nested_plans():
+    plan = {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {
+        "stage": "OR", "inputStages": [{"stage": "IXSCAN"}, {"stage": "IXSCAN"}]}}}
+    assert indexes.plan_stages(plan) == ["LIMIT", "FETCH", "OR", "IXSCAN", "IXSCAN"]
@@ -0,0 +1,103 @@
+"""GPS ping parsing, bucketing and the cached track.
+
+    python -m pytest tests
+"""
+import json
+import math
+import threading
+import urllib.error
+import urllib.request
+
+import mongomock
+import pytest
+from pymongo import errors
+
+import mongo
+import pings
+
+
+START = 1_767_225_600  # 2026-01-01 00:00 UTC, a bucket boundary
+
+
+def trace(first, count):
+    # One ping a minute along a straight road, pings.parse_ping's output.
+    return [(pings.DEFAULT_DEVICE, START + 60 * n, 15.0 + 0.01 * n, 80.0 + 0.01 * math.sin(n / 5))
+            for n in range(first, first + count)]
+
+
+@pytest.fixture
+def collection():
+    return mongo.region_collections(mongomock.MongoClient()[mongo.DB_NAME], "east")["pings"]
+
+
+def test_late_upload_reaches_a_running_track(collection):
+    track = pings.Track(max_points=10_000)
+    # The vehicle lost signal halfway through the first hour and kept driving.
+    pings.ingest(collection, trace(0, 30))
+    pings.ingest(collection, trace(180, 10))
+    before = track.refresh(collection, now=START + 3 * 3600 + 600)
+
+    # Its backlog is uploaded three hours later, into long-closed buckets.
+    pings.ingest(collection, trace(30, 150))
+    after = track.refresh(collection, now=START + 3 * 3600 + 660, max_age=0)
+    fresh = pings.Track(max_points=10_000).refresh(collection, now=START + 3 * 3600 + 660)
+    assert len(after["points"]) > len(before["points"])
+    assert after["points"] == fresh["points"]
+
+
+def test_refresh_skips_buckets_nobody_uploaded_to(collection, monkeypatch):
+    monkeypatch.setattr(pings, "INGEST_OVERLAP_SECONDS", 0)
+    track = pings.Track()
+    pings.ingest(collection, trace(0, 120))
+    track.refresh(collection, now=START + 2 * 3600 + 600)
+    pings.ingest(collection, trace(140, 1))
+    query = pings.refresh_query(track.device, START + 2 * 3600, track._ingested)
+    assert [doc["start"] for doc in collection.find(query)] == [START + 2 * 3600]
+
+
+@pytest.mark.parametrize("t", ["nan", "inf", "-inf", float("nan"), float("inf")])
+def test_parse_ping_rejects_non_finite_times(t):
+    with pytest.raises(ValueError):
+        pings.parse_ping({"t": t, "lat": 15.0, "lng": 80.0})
+
+
+def test_parse_ping_reads_iso_times():
+    assert pings.parse_ping({"t": "2026-01-01T00:01:00Z", "lat": "15.0", "lng": 80})[1:] == (START + 60, 15.0, 80.0)
+
+
+class Down:
+    # A Mongo database whose every collection fails like an unreachable server.
+    def __getitem__(self, name):
+        return self
+
+    def update_one(self, *args, **kwargs):
+        raise errors.ServerSelectionTimeoutError("no servers available")
+
+
+@pytest.fixture
+def post():
+    servers = []
+
+    def post(db, body):
+        server = pings.make_server(db, "127.0.0.1", 0)
+        servers.append(server)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}/pings?region=east",
+                                         data=json.dumps(body).encode(), method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    yield post
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_serve_answers_bad_times_and_outages(post):
+    db = mongomock.MongoClient()[mongo.DB_NAME]
+    assert post(db, [{"t": "nan", "lat": 15.0, "lng": 80.0}])[0] == 400
+    assert post(Down(), [{"t": START, "lat": 15.0, "lng": 80.0}])[0] == 503
+    assert post(db, [{"t": START, "lat": 15.0, "lng": 80.0}]) == (200, {"stored": 1})
@@ -0,0 +1,154 @@
+"""Dashboard aggregations against the pandas math they replaced.
+
+    python -m pytest tests
+
+Raw team and cyclist logs are seeded into mongomock, with several team
+entries on some days and dates stored both as strings and as BSON dates,
+and the rollups are filled the three ways the app does it: one entry at a
+time from the forms, in batches from the write queue, and by `rebuild`.
+The readers in `queries` must then show what the original page computed
+from the raw logs with pandas.
+"""
+import random
+from datetime import date, datetime, timedelta
+
+import mongomock
+import pandas as pd
+import pytest
+
+import dates
+import mongo
+import queries
+import rollups
+
+
+CYCLISTS = ["Asha", "Bharat", "Chitra", "Dev", "Esha"]
+DAYS = 40
+
+
+def raw_logs(seed=0):
+    rng = random.Random(seed)
+    team, individuals = [], []
+    for n in range(DAYS):
+        day = date(2026, 1, 1) + timedelta(days=n)
+        # Some days have no team entry, some several (corrections, two shifts).
+        for _ in range(rng.choice([0, 1, 1, 1, 2, 3])):
+            team.append({"date": stored(day, rng), "team_total_distance": round(rng.uniform(50, 400), 1),
+                         "team_avg_speed": round(rng.uniform(12, 30), 1)})
+        for cyclist in rng.sample(CYCLISTS, rng.randint(1, len(CYCLISTS))):
+            individuals.append({"cyclist": cyclist, "date": stored(day, rng),
+                                "daily_distance": round(rng.uniform(1, 90), 1)})
+    return team, individuals
+
+
+def stored(day, rng):
+    # Older entries hold ISO strings, migrated ones BSON dates (see `dates`).
+    return day.isoformat() if rng.random() < 0.5 else datetime(day.year, day.month, day.day)
+
+
+def pandas_baseline(team, individuals):
+    # The original page's computations.  It only ever saw ISO strings, so
+    # dates go through `dates.day_key` first.
+    df_team = pd.DataFrame(team)
+    df_team['date'] = pd.to_datetime(df_team['date'].map(dates.day_key))
+    df_individual = pd.DataFrame(individuals)
+    df_individual['date'] = pd.to_datetime(df_individual['date'].map(dates.day_key))
+    summary = df_individual.groupby('cyclist')['daily_distance'].sum().round(1).sort_values(ascending=False)
+    df_daily = df_team.groupby(df_team['date'].dt.date)['team_total_distance'].sum().reset_index()
+    df_daily = df_daily.sort_values('date')
+    return {
+        "total_distance": df_team['team_total_distance'].sum(),
+        "avg_speed": df_team['team_avg_speed'].mean().round(1),
+        "days_active": len(df_team['date'].dt.date.unique()),
+        "cyclists": df_individual['cyclist'].nunique(),
+        "leaderboard": list(summary.items()),
+        "daily": [(day.isoformat(), distance) for day, distance in df_daily.tail(30).itertuples(index=False)],
+    }
+
+
+def record_one_by_one(dbs, team, individuals):
+    for entry in team:
+        rollups.record_team(dbs, entry)
+    for entry in individuals:
+        rollups.record_individual(dbs, entry)
+
+
+def record_batched(dbs, team, individuals):
+    for entry in team:
+        rollups.record_team(dbs, entry)
+    rollups.record_individuals(dbs, individuals)
+
+
+def rebuild(dbs, team, individuals):
+    rollups.rebuild(dbs)
+
+
+@pytest.fixture
+def dbs():
+    return mongo.region_collections(mongomock.MongoClient()[mongo.DB_NAME], "east")
+
+
+def insert(dbs, team, individuals):
+    # The raw logs as stored, `_id` included, the way the write queue rolls them up.
+    team, individuals = [dict(entry) for entry in team], [dict(entry) for entry in individuals]
+    dbs["team"].insert_many(team)
+    dbs["individuals"].insert_many(individuals)
+    return team, individuals
+
+
+@pytest.mark.parametrize("fill", [record_one_by_one, record_batched, rebuild])
+def test_readers_match_pandas(dbs, fill):
+    team, individuals = raw_logs()
+    fill(dbs, *insert(dbs, team, individuals))
+    expected = pandas_baseline(team, individuals)
+
+    summary = queries.team_summary(dbs["daily_totals"])
+    assert summary["logs"] == len(team)
+    assert summary["total_distance"] == pytest.approx(expected["total_distance"])
+    assert summary["avg_speed"] == expected["avg_speed"]
+    assert summary["days_active"] == expected["days_active"]
+    assert queries.cyclist_count(dbs["cyclist_totals"]) == expected["cyclists"]
+
+    leaderboard = [(row["cyclist"], row["total"]) for row in queries.leaderboard(dbs["cyclist_totals"])]
+    assert [name for name, _ in leaderboard] == [name for name, _ in expected["leaderboard"]]
+    assert [total for _, total in leaderboard] == pytest.approx([total for _, total in expected["leaderboard"]])
+
+    daily = [(row["date"], row["team_total_distance"]) for row in queries.daily_team_distance(dbs["daily_totals"], days=30)]
+    assert [day for day, _ in daily] == [day for day, _ in expected["daily"]]
+    assert [total for _, total in daily] == pytest.approx([total for _, total in expected["daily"]])
+
+
+def test_rebuild_matches_incremental_rollups(dbs):
+    record_one_by_one(dbs, *insert(dbs, *raw_logs(seed=1)))
+    incremental = {name: {doc["_id"]: doc for doc in dbs[name].find()} for name in ("cyclist_totals", "daily_totals")}
+
+    rollups.rebuild(dbs)
+    for name, before in incremental.items():
+        after = {doc["_id"]: doc for doc in dbs[name].find()}
+        assert after.keys() == before.keys()
+        for key, doc in after.items():
+            assert sorted(doc.pop(rollups.APPLIED)) == sorted(before[key].pop(rollups.APPLIED)), (name, key)
+            totals = {field: value for field, value in before[key].items() if field != "_id"}
+            assert {field: value for field, value in doc.items() if field != "_id"} == pytest.approx(totals), (name, key)
+
+
+def test_empty_region(dbs):
+    assert queries.team_summary(dbs["daily_totals"]) is None
+    assert queries.cyclist_count(dbs["cyclist_totals"]) == 0
+    assert queries.leaderboard(dbs["cyclist_totals"]) == []
+    assert queries.daily_team_distance(dbs["daily_totals"], days=30) == []
+
+
+def test_batched_rollups_count_entries_recorded_before_once(dbs):
+    # A retried queue batch can mix entries already counted with new ones.
+    individuals = [dict(entry) for entry in raw_logs()[1][:12]]
+    dbs["individuals"].insert_many(individuals)
+    for entry in individuals[:5]:
+        rollups.record_individual(dbs, entry)
+    rollups.record_individuals(dbs, individuals)
+    rollups.record_individuals(dbs, individuals)
+    expected = pandas_baseline([{"date": "2026-01-01", "team_total_distance": 0, "team_avg_speed": 0}], individuals)
+    leaderboard = [(row["cyclist"], row["total"]) for row in queries.leaderboard(dbs["cyclist_totals"])]
+    assert [name for name, _ in leaderboard] == [name for name, _ in expected["leaderboard"]]
+    assert [total for _, total in leaderboard] == pytest.approx([total for _, total in expected["leaderboard"]])
+    assert sum(doc["individual_logs"] for doc in dbs["daily_totals"].find()) == len(individuals)
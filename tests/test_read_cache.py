@@ -0,0 +1,145 @@
+"""`read_cache.ReadCache`: expiry, the LRU bound and invalidation.
+
+    python -m pytest tests
+"""
+import threading
+import types
+
+import pytest
+
+import read_cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(read_cache, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+class Loads:
+    # A load function per value that counts how often it ran.
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, value):
+        def load():
+            self.calls += 1
+            return value
+        return load
+
+
+def test_hits_and_misses_are_counted():
+    cache, loads = read_cache.ReadCache(), Loads()
+    assert cache.get("east", "team", "summary", loads(1)) == 1
+    assert cache.get("east", "team", "summary", loads(2)) == 1
+    assert cache.get("west", "team", "summary", loads(3)) == 3
+    assert loads.calls == 2
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": pytest.approx(1 / 3), "invalidations": 0, "entries": 2}
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache, loads = read_cache.ReadCache(ttl=30), Loads()
+    cache.get("east", "team", "summary", loads(1))
+    clock.now += 29.9
+    assert cache.get("east", "team", "summary", loads(2)) == 1
+    clock.now += 0.1
+    assert cache.get("east", "team", "summary", loads(2)) == 2
+
+
+def test_per_entry_ttl_overrides_the_default(clock):
+    cache, loads = read_cache.ReadCache(ttl=30), Loads()
+    cache.get("east", "changes", "versions", loads(1), ttl=5)
+    cache.get("east", "team", "summary", loads("a"))
+    clock.now += 5
+    assert cache.get("east", "changes", "versions", loads(2), ttl=5) == 2
+    assert cache.get("east", "team", "summary", loads("b")) == "a"
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache, loads = read_cache.ReadCache(max_entries=2), Loads()
+    cache.get("east", "team", "a", loads("a"))
+    cache.get("east", "team", "b", loads("b"))
+    cache.get("east", "team", "a", loads("a, again"))  # "b" is now the oldest
+    cache.get("east", "team", "c", loads("c"))
+    assert cache.stats()["entries"] == 2
+    assert cache.get("east", "team", "a", loads("a, again")) == "a"
+    assert cache.get("east", "team", "b", loads("b, again")) == "b, again"
+
+
+def test_invalidate_drops_only_the_touched_collections():
+    cache, loads = read_cache.ReadCache(), Loads()
+    for region in ("east", "west"):
+        for collection in ("team", "locations"):
+            cache.get(region, collection, "q", loads(f"{region} {collection}"))
+    cache.invalidate("east", "team")
+    assert cache.get("east", "team", "q", loads("new")) == "new"
+    assert cache.get("east", "locations", "q", loads("new")) == "east locations"
+    assert cache.get("west", "team", "q", loads("new")) == "west team"
+    cache.invalidate("west")
+    assert cache.get("west", "locations", "q", loads("new")) == "new"
+    assert cache.stats()["invalidations"] == 2
+
+
+def overlapping_load(cache, invalidate):
+    # Starts a load, runs `invalidate` while it is in flight, then lets it finish.
+    started, release = threading.Event(), threading.Event()
+
+    def load():
+        started.set()
+        release.wait(5)
+        return "read before the write"
+
+    result = []
+    loader = threading.Thread(target=lambda: result.append(cache.get("east", "team", "summary", load)))
+    loader.start()
+    assert started.wait(5)
+    invalidate()
+    release.set()
+    loader.join(5)
+    return result[0]
+
+
+@pytest.mark.parametrize("invalidate", [
+    lambda cache: cache.invalidate("east", "team"),
+    lambda cache: cache.invalidate("east"),
+], ids=["collection", "region"])
+def test_load_overlapping_a_write_is_not_cached(invalidate):
+    cache = read_cache.ReadCache()
+    # The session that loaded still gets its value, but no later one does.
+    assert overlapping_load(cache, lambda: invalidate(cache)) == "read before the write"
+    assert cache.get("east", "team", "summary", lambda: "read after the write") == "read after the write"
+
+
+def test_load_overlapping_another_collection_write_is_cached():
+    cache = read_cache.ReadCache()
+    overlapping_load(cache, lambda: cache.invalidate("east", "locations"))
+    assert cache.get("east", "team", "summary", lambda: "reloaded") == "read before the write"
+
+
+def test_concurrent_misses_share_one_load():
+    cache, calls, release = read_cache.ReadCache(), [], threading.Event()
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("east", "team", "summary", load)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["value"] * 8
+    assert len(calls) == 1
@@ -0,0 +1,76 @@
+"""`snapshots.SnapshotStore` through a Mongo outage.
+
+    python -m pytest tests
+"""
+import threading
+
+import pytest
+
+import snapshots
+
+
+class Mongo:
+    # Counts loads; raises while `down` is set, like a server selection timeout.
+    def __init__(self):
+        self.down = False
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def load(self, value):
+        def load():
+            with self.lock:
+                self.calls += 1
+            if self.down:
+                raise ConnectionError("no servers available")
+            return value
+        return load
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = snapshots.SnapshotStore(str(tmp_path))
+    yield store
+    store._pool.shutdown(wait=True)
+
+
+def settle(store, workers=2):
+    # Waits for the background refreshes submitted so far: every refresh
+    # thread has to finish its work before it can reach the barrier.
+    barrier = threading.Barrier(workers)
+    for future in [store.submit(barrier.wait) for _ in range(workers)]:
+        future.result()
+
+
+def test_outage_serves_saved_values_without_trying_mongo(store):
+    mongo = Mongo()
+    queries = [f"query{n}" for n in range(8)]
+    for query in queries:
+        assert store.read("east", query, mongo.load(query)) == query
+
+    mongo.down = True
+    assert store.read("east", queries[0], mongo.load("new")) == queries[0]
+    assert store.error("east") == "no servers available"
+    settle(store)
+    foreground = mongo.calls
+    for query in queries[1:]:
+        assert store.read("east", query, mongo.load("new")) == query
+    # Only the background refreshes went to Mongo, one per query.
+    settle(store)
+    assert mongo.calls - foreground == len(queries) - 1
+    assert store.staleness("east")[1] == "no servers available"
+
+    mongo.down = False
+    store.read("east", queries[0], mongo.load("new"))
+    settle(store)
+    assert store.error("east") is None
+    assert store.read("east", queries[0], mongo.load("new")) == "new"
+
+
+def test_outage_in_one_region_leaves_others_live(store):
+    mongo = Mongo()
+    store.read("east", "leaderboard", mongo.load("east"))
+    store.read("west", "leaderboard", mongo.load("west"))
+    store._errors["east"] = "no servers available"
+    before = mongo.calls
+    assert store.read("west", "leaderboard", mongo.load("west, newer")) == "west, newer"
+    assert mongo.calls == before + 1
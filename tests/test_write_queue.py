@@ -0,0 +1,121 @@
+"""`write_queue.WriteQueue` flushing into mongomock.
+
+    python -m pytest tests
+"""
+from datetime import date
+
+import mongomock
+import pytest
+from pymongo import errors
+
+import dates
+import mongo
+import write_queue
+
+
+class Failing:
+    # A collection whose `method` raises the first `times` calls, after `before` calls went through.
+    def __init__(self, collection, method, times=1, before=0, error=None):
+        self.collection, self.method = collection, method
+        self.times, self.before = times, before
+        self.error = error or errors.AutoReconnect("connection reset")
+
+    def __getattr__(self, name):
+        call = getattr(self.collection, name)
+        if name != self.method:
+            return call
+
+        def failing(*args, **kwargs):
+            if self.before:
+                self.before -= 1
+            elif self.times:
+                self.times -= 1
+                raise self.error
+            return call(*args, **kwargs)
+        return failing
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # Retries are due at once.
+    monkeypatch.setattr(write_queue, "BACKOFF_SECONDS", 0)
+    return mongomock.MongoClient()[mongo.DB_NAME]
+
+
+def queue(db, tmp_path, flushed=None, failing=None):
+    # `failing` maps a collection name to the Failing stand-in for it.
+    failing = failing or {}
+
+    def region_db(region):
+        dbs = mongo.region_collections(db, region)
+        return {name: failing[name] if name in failing else collection for name, collection in dbs.items()}
+
+    queue = write_queue.WriteQueue(region_db, flushed, path=str(tmp_path / "journal.sqlite3"))
+    # Flushed by the test, not the background thread.
+    queue.stop()
+    return queue
+
+
+def test_failing_callback_does_not_stop_the_flush(db, tmp_path):
+    calls = []
+
+    def flushed(region, collections):
+        calls.append(region)
+        raise ConnectionError("changes.bump timed out")
+
+    writes = queue(db, tmp_path, flushed)
+    east = writes.submit("east", "locations", [{"name": "Checkpoint 1", "lat": 19.0, "lng": 72.8}])
+    west = writes.submit("west", "locations", [{"name": "Checkpoint 2", "lat": 12.9, "lng": 74.8}])
+    assert writes.flush() == 2
+    assert calls == ["east", "west"]
+    assert writes.wait(east + west, timeout=0)
+    assert writes.counts() == {"pending": 0, "failed": 0}
+    assert mongo.region_collections(db, "west")["locations"].count_documents({}) == 1
+
+
+def test_retried_rollups_count_each_entry_once(db, tmp_path):
+    dbs = mongo.region_collections(db, "east")
+    writes = queue(db, tmp_path, failing={"daily_totals": Failing(dbs["daily_totals"], "update_one")})
+    writes.submit("east", "individuals", [{"cyclist": "Asha", "date": dates.stored(date(2026, 1, 4)), "daily_distance": 10.0}])
+    assert writes.flush() == 0
+    assert writes.counts() == {"pending": 1, "failed": 0}
+    assert writes.flush() == 1
+
+    totals = dbs["cyclist_totals"].find_one({"_id": "Asha"}, {"_id": 0, "applied": 0})
+    assert totals == {"total_distance": 10.0, "logs": 1}
+    day = dbs["daily_totals"].find_one({"_id": "2026-01-04"}, {"_id": 0, "applied": 0})
+    assert day == {"individual_distance": 10.0, "individual_logs": 1}
+    assert dbs["individuals"].count_documents({}) == 1
+
+
+def test_team_rollups_failing_partway_are_not_counted_twice(db, tmp_path):
+    dbs = mongo.region_collections(db, "east")
+    writes = queue(db, tmp_path, failing={"daily_totals": Failing(dbs["daily_totals"], "update_one", before=1)})
+    day = dates.stored(date(2026, 1, 4))
+    writes.submit("east", "team", [{"date": day, "team_total_distance": 100.0, "team_avg_speed": 20.0},
+                                   {"date": day, "team_total_distance": 50.0, "team_avg_speed": 30.0}])
+    assert writes.flush() == 0
+    assert writes.flush() == 2
+    totals = dbs["daily_totals"].find_one({"_id": "2026-01-04"}, {"_id": 0, "applied": 0})
+    assert totals == {"team_distance": 150.0, "team_speed_sum": 50.0, "team_logs": 2}
+
+
+def test_refused_documents_leave_the_rest_of_the_batch_rolled_up(db, tmp_path):
+    dbs = mongo.region_collections(db, "east")
+
+    class Refusing:
+        # Inserts everything but the second document, like a schema validator would.
+        def __getattr__(self, name):
+            return getattr(dbs["individuals"], name)
+
+        def insert_many(self, docs, ordered=True):
+            dbs["individuals"].insert_many([doc for i, doc in enumerate(docs) if i != 1])
+            raise errors.BulkWriteError({"writeErrors": [{"index": 1, "code": 121, "errmsg": "Document failed validation"}]})
+
+    writes = queue(db, tmp_path, failing={"individuals": Refusing()})
+    day = dates.stored(date(2026, 1, 4))
+    writes.submit("east", "individuals", [{"cyclist": name, "date": day, "daily_distance": 10.0}
+                                          for name in ("Asha", "Bharat")])
+    assert writes.flush() == 1
+    assert writes.counts() == {"pending": 1, "failed": 0}
+    assert [doc["_id"] for doc in dbs["cyclist_totals"].find()] == ["Asha"]
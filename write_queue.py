@@ -0,0 +1,230 @@
+"""Write-behind queue for the admin entry forms.
+
+A submit lands in a small SQLite journal on local disk and returns at once;
+a background thread flushes the journal to Mongo in batches, retrying with
+exponential backoff while the connection is down.  Entries survive an app
+restart and are only removed once Mongo has them.
+
+Every entry gets an ObjectId when it is queued and is inserted under that
+`_id`, so a batch retried after an ambiguous failure cannot insert twice,
+and the rollups count each `_id` once (see `rollups`), so retrying a batch
+whose rollups failed partway does not count anything twice.  Entries Mongo
+refuses are retried on their own; the rest of their batch is rolled up and
+leaves the journal.
+"""
+import contextlib
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from bson import ObjectId, json_util
+from pymongo import errors
+
+import rollups
+
+
+JOURNAL_PATH = os.environ.get("CYCLOTHON_JOURNAL", "write_journal.sqlite3")
+BATCH_SIZE = 200
+MAX_ATTEMPTS = 8
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+POLL_SECONDS = 2.0
+
+DUPLICATE_KEY = 11000
+
+
+def _individual_rollups(dbs, docs):
+    if len(docs) == 1:
+        rollups.record_individual(dbs, docs[0])
+    else:
+        rollups.record_individuals(dbs, docs)
+
+
+def _team_rollups(dbs, docs):
+    for doc in docs:
+        rollups.record_team(dbs, doc)
+
+
+# What a queued entry of each kind writes: its raw collection, the rollups
+# kept next to it, and every collection whose readers must be told.
+KINDS = {
+    "individuals": {"rollup": _individual_rollups, "touches": ("individuals", "cyclist_totals", "daily_totals")},
+    "team": {"rollup": _team_rollups, "touches": ("team", "daily_totals")},
+    "locations": {"rollup": None, "touches": ("locations",)},
+    "beacons": {"rollup": None, "touches": ("beacons",)},
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS writes (
+    id TEXT PRIMARY KEY,
+    region TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    doc TEXT NOT NULL,
+    failed INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    queued_at REAL NOT NULL
+)
+"""
+
+
+class WriteQueue:
+    def __init__(self, region_db, flushed=None, path=None):
+        # `region_db(region)` returns the region's collections; `flushed(region,
+        # collections)` runs after a batch reached Mongo.
+        self.region_db = region_db
+        self.flushed = flushed
+        self.path = path or JOURNAL_PATH
+        self._wake = threading.Event()
+        self._done = threading.Condition()
+        self._stopping = False
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(_SCHEMA)
+        self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+        self._thread.start()
+
+    @contextlib.contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def submit(self, region, kind, docs):
+        # Journal the documents and return their ids; Mongo is written later.
+        if kind not in KINDS:
+            raise ValueError(f"unknown write kind {kind!r}")
+        ids, now = [], time.time()
+        rows = []
+        for doc in docs:
+            doc = dict(doc, _id=doc.get("_id") or ObjectId())
+            ids.append(str(doc["_id"]))
+            rows.append((ids[-1], region, kind, json_util.dumps(doc), now))
+        with self._connect() as db:
+            db.executemany("INSERT INTO writes (id, region, kind, doc, queued_at) VALUES (?, ?, ?, ?, ?)", rows)
+        self._wake.set()
+        return ids
+
+    def wait(self, ids, timeout):
+        # True once every id has been flushed, False if `timeout` ran out first.
+        deadline = time.monotonic() + timeout
+        with self._done:
+            while self._queued(ids):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._done.wait(remaining)
+        return True
+
+    def _queued(self, ids):
+        with self._connect() as db:
+            marks = ",".join("?" * len(ids))
+            return db.execute(f"SELECT COUNT(*) FROM writes WHERE id IN ({marks})", ids).fetchone()[0]
+
+    def counts(self):
+        with self._connect() as db:
+            pending, failed = db.execute(
+                "SELECT COALESCE(SUM(failed = 0), 0), COALESCE(SUM(failed = 1), 0) FROM writes").fetchone()
+        return {"pending": pending, "failed": failed}
+
+    def failures(self, limit=20):
+        with self._connect() as db:
+            return [{"region": region, "kind": kind, "attempts": attempts, "error": error}
+                    for region, kind, attempts, error in db.execute(
+                        "SELECT region, kind, attempts, error FROM writes WHERE failed = 1 ORDER BY queued_at LIMIT ?",
+                        (limit,))]
+
+    def retry_failed(self):
+        with self._connect() as db:
+            db.execute("UPDATE writes SET failed = 0, attempts = 0, next_attempt = 0 WHERE failed = 1")
+        self._wake.set()
+
+    def stop(self, timeout=5):
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                flushed = self.flush()
+            except Exception:
+                # The journal itself failed (disk full, locked); try again later.
+                flushed = 0
+            if not flushed:
+                self._wake.wait(POLL_SECONDS)
+                self._wake.clear()
+
+    def flush(self):
+        # Write one batch of due entries; returns how many reached Mongo.
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT id, region, kind, doc, attempts FROM writes "
+                "WHERE failed = 0 AND next_attempt <= ? ORDER BY queued_at, rowid LIMIT ?",
+                (time.time(), BATCH_SIZE)).fetchall()
+        groups = {}
+        for row in rows:
+            groups.setdefault((row[1], row[2]), []).append(row)
+
+        written = 0
+        for (region, kind), group in groups.items():
+            try:
+                refused = self._write(region, kind, group)
+            except Exception as e:
+                # Connection trouble and failed rollups alike; the batch is
+                # retried whole, which the entry ids make safe.
+                self._backoff(group, e)
+                continue
+            if refused:
+                # Documents Mongo refused end up failed after MAX_ATTEMPTS
+                # instead of blocking the queue.
+                self._backoff([row for row, _ in refused], refused[0][1])
+            if len(refused) == len(group):
+                continue
+            written += len(group) - len(refused)
+            if self.flushed:
+                try:
+                    self.flushed(region, KINDS[kind]["touches"])
+                except Exception:
+                    # The batch is in Mongo and out of the journal either way;
+                    # the other groups and the waiting forms must still go on.
+                    pass
+        if written:
+            with self._done:
+                self._done.notify_all()
+        return written
+
+    def _write(self, region, kind, group):
+        # Inserts, rolls up and unjournals the batch; returns the [(row, error)]
+        # Mongo refused, which are neither rolled up nor removed.
+        dbs = self.region_db(region)
+        docs = [json_util.loads(row[3]) for row in group]
+        refused = {}
+        try:
+            dbs[kind].insert_many(docs, ordered=False)
+        except errors.BulkWriteError as e:
+            # Duplicates were inserted by an earlier attempt whose reply was lost;
+            # an unordered insert still wrote everything else around the refusals.
+            refused = {error["index"]: error.get("errmsg", str(error)) for error in e.details["writeErrors"]
+                       if error["code"] != DUPLICATE_KEY}
+        inserted = [i for i in range(len(group)) if i not in refused]
+        rollup = KINDS[kind]["rollup"]
+        if rollup and inserted:
+            rollup(dbs, [docs[i] for i in inserted])
+        with self._connect() as db:
+            db.executemany("DELETE FROM writes WHERE id = ?", [(group[i][0],) for i in inserted])
+        return [(group[i], refused[i]) for i in sorted(refused)]
+
+    def _backoff(self, group, error):
+        with self._connect() as db:
+            for row in group:
+                attempts = row[4] + 1
+                delay = min(BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.0)
+                db.execute("UPDATE writes SET attempts = ?, next_attempt = ?, failed = ?, error = ? WHERE id = ?",
+                           (attempts, time.time() + delay, int(attempts >= MAX_ATTEMPTS), str(error)[:500], row[0]))